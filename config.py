@@ -53,6 +53,42 @@ def validate() -> None:
     if BRAVE_SEARCH_COUNT <= 0:
         logging.critical("BRAVE_SEARCH_COUNT debe ser mayor a 0")
         sys.exit(1)
+    if SEARCH_MAX_CONCURRENCY <= 0:
+        logging.critical("SEARCH_MAX_CONCURRENCY debe ser mayor a 0")
+        sys.exit(1)
+    if SEARCH_RATE_PER_SECOND < 0:
+        logging.critical("SEARCH_RATE_PER_SECOND no puede ser negativo")
+        sys.exit(1)
+    if SEARCH_CACHE_TTL_HOURS <= 0:
+        logging.critical("SEARCH_CACHE_TTL_HOURS debe ser mayor a 0")
+        sys.exit(1)
+    if SEARCH_CACHE_MAX_MB < 0:
+        logging.critical("SEARCH_CACHE_MAX_MB no puede ser negativo")
+        sys.exit(1)
+    if SCORER_BATCH_SIZE <= 0:
+        logging.critical("SCORER_BATCH_SIZE debe ser mayor a 0")
+        sys.exit(1)
+    if SCORE_CACHE_TTL_HOURS <= 0:
+        logging.critical("SCORE_CACHE_TTL_HOURS debe ser mayor a 0")
+        sys.exit(1)
+    if SCORER_PREFILTER_TOP_K < 0:
+        logging.critical("SCORER_PREFILTER_TOP_K no puede ser negativo")
+        sys.exit(1)
+    if SCORER_MAX_CONCURRENCY <= 0:
+        logging.critical("SCORER_MAX_CONCURRENCY debe ser mayor a 0")
+        sys.exit(1)
+    if SCORER_GOOD_ENOUGH_SCORE < 0 or SCORER_GOOD_ENOUGH_SCORE > 1:
+        logging.critical("SCORER_GOOD_ENOUGH_SCORE debe estar entre 0 y 1")
+        sys.exit(1)
+    if WP_HTTP_MAX_CONNECTIONS <= 0 or WP_HTTP_MAX_KEEPALIVE < 0:
+        logging.critical("WP_HTTP_MAX_CONNECTIONS debe ser mayor a 0 y WP_HTTP_MAX_KEEPALIVE no negativo")
+        sys.exit(1)
+    if WP_TERMS_CACHE_TTL_HOURS <= 0:
+        logging.critical("WP_TERMS_CACHE_TTL_HOURS debe ser mayor a 0")
+        sys.exit(1)
+    if WP_AUTHOR_CACHE_TTL_HOURS <= 0:
+        logging.critical("WP_AUTHOR_CACHE_TTL_HOURS debe ser mayor a 0")
+        sys.exit(1)
     if WP_IMAGE_WIDTH <= 0 or WP_IMAGE_HEIGHT <= 0:
         logging.critical("WP_IMAGE_WIDTH y WP_IMAGE_HEIGHT deben ser mayores a 0")
         sys.exit(1)
@@ -65,9 +101,45 @@ def validate() -> None:
     if SOURCE_FETCH_MAX_CHARS < 2000:
         logging.critical("SOURCE_FETCH_MAX_CHARS debe ser al menos 2000")
         sys.exit(1)
+    if SOURCE_FETCH_MAX_BYTES < 65536:
+        logging.critical("SOURCE_FETCH_MAX_BYTES debe ser al menos 65536")
+        sys.exit(1)
+    if SOURCE_PREFETCH_TOP_N < 1:
+        logging.critical("SOURCE_PREFETCH_TOP_N debe ser al menos 1")
+        sys.exit(1)
+    if SOURCE_MIN_TEXT_CHARS < 0:
+        logging.critical("SOURCE_MIN_TEXT_CHARS no puede ser negativo")
+        sys.exit(1)
+    if SOURCE_CACHE_TTL_HOURS < 0:
+        logging.critical("SOURCE_CACHE_TTL_HOURS no puede ser negativo")
+        sys.exit(1)
+    if SOURCE_CACHE_MAX_MB < 0:
+        logging.critical("SOURCE_CACHE_MAX_MB no puede ser negativo")
+        sys.exit(1)
+    if HTML_PARSER not in {"auto", "lxml", "html.parser"}:
+        logging.critical("HTML_PARSER debe ser auto, lxml o html.parser")
+        sys.exit(1)
+    if TOPICS_CONCURRENCY < 1:
+        logging.critical("TOPICS_CONCURRENCY debe ser al menos 1")
+        sys.exit(1)
+    if CUADERNILLOS_CONCURRENCY < 1:
+        logging.critical("CUADERNILLOS_CONCURRENCY debe ser al menos 1")
+        sys.exit(1)
+    if GEMINI_TEXT_RPM < 0 or GEMINI_IMAGE_RPM < 0 or WP_REQUESTS_PER_SECOND < 0:
+        logging.critical("GEMINI_TEXT_RPM, GEMINI_IMAGE_RPM y WP_REQUESTS_PER_SECOND no pueden ser negativos")
+        sys.exit(1)
     if LINK_CHECK_TIMEOUT <= 0:
         logging.critical("LINK_CHECK_TIMEOUT debe ser mayor a 0")
         sys.exit(1)
+    if LINK_CHECK_MAX_CONCURRENCY < 1 or LINK_CHECK_PER_HOST < 1:
+        logging.critical("LINK_CHECK_MAX_CONCURRENCY y LINK_CHECK_PER_HOST deben ser al menos 1")
+        sys.exit(1)
+    if LINK_CHECK_DEADLINE_SECONDS <= 0:
+        logging.critical("LINK_CHECK_DEADLINE_SECONDS debe ser mayor a 0")
+        sys.exit(1)
+    if LINK_HEALTH_OK_TTL_HOURS < 0 or LINK_HEALTH_BROKEN_TTL_HOURS < 0:
+        logging.critical("LINK_HEALTH_OK_TTL_HOURS y LINK_HEALTH_BROKEN_TTL_HOURS no pueden ser negativos")
+        sys.exit(1)
     if RECENT_POSTS_GALLERY_COUNT < 0:
         logging.critical("RECENT_POSTS_GALLERY_COUNT no puede ser negativo")
         sys.exit(1)
@@ -150,11 +222,26 @@ BRAVE_SEARCH_COUNT = int(os.environ.get("BRAVE_SEARCH_COUNT", "20"))
 BRAVE_SEARCH_COUNTRY = os.environ.get("BRAVE_SEARCH_COUNTRY", "").strip()
 BRAVE_SEARCH_LANG = os.environ.get("BRAVE_SEARCH_LANG", "").strip()
 BRAVE_SEARCH_FRESHNESS = os.environ.get("BRAVE_SEARCH_FRESHNESS", "pw").strip()
+# Consultas simultáneas por proveedor y tasa máxima (token bucket, 0 = sin límite).
+SEARCH_MAX_CONCURRENCY = int(os.environ.get("SEARCH_MAX_CONCURRENCY", "4"))
+SEARCH_RATE_PER_SECOND = float(os.environ.get("SEARCH_RATE_PER_SECOND", "1"))
+# Cache en SQLite de respuestas crudas del proveedor (0 MB = sin límite de tamaño).
+SEARCH_CACHE_ENABLED = os.environ.get("SEARCH_CACHE_ENABLED", "1") == "1"
+SEARCH_CACHE_TTL_HOURS = float(os.environ.get("SEARCH_CACHE_TTL_HOURS", "12"))
+SEARCH_CACHE_MAX_MB = float(os.environ.get("SEARCH_CACHE_MAX_MB", "50"))
 GOOGLE_CSE_KEY = os.environ.get("GOOGLE_CSE_KEY", "")
 GOOGLE_CSE_CX = os.environ.get("GOOGLE_CSE_CX", "")
 WP_SITE_URL = os.environ.get("WP_SITE_URL", "").rstrip("/")
 WP_USERNAME = os.environ.get("WP_USERNAME", "")
 WP_APP_PASSWORD = os.environ.get("WP_APP_PASSWORD", "")
+# Cliente HTTP compartido para la API de WordPress (HTTP/2 solo si está instalado 'h2').
+WP_HTTP2 = os.environ.get("WP_HTTP2", "1") == "1"
+WP_HTTP_MAX_CONNECTIONS = int(os.environ.get("WP_HTTP_MAX_CONNECTIONS", "10"))
+WP_HTTP_MAX_KEEPALIVE = int(os.environ.get("WP_HTTP_MAX_KEEPALIVE", "5"))
+# Vigencia del índice local de categorías/tags de WordPress.
+WP_TERMS_CACHE_TTL_HOURS = float(os.environ.get("WP_TERMS_CACHE_TTL_HOURS", "24"))
+# Vigencia del cache persistente de autores (IDs de usuario de WordPress).
+WP_AUTHOR_CACHE_TTL_HOURS = float(os.environ.get("WP_AUTHOR_CACHE_TTL_HOURS", "168"))
 
 SEARCH_QUERIES = [
     q.strip()
@@ -216,6 +303,17 @@ GEMINI_CONTENT_MODEL = (
     or _LEGACY_GEMINI_TEXT_MODEL
     or "gemini-2.5-pro"
 )
+# Artículos evaluados por petición a Gemini en scoring (1 = una petición por artículo).
+SCORER_BATCH_SIZE = int(os.environ.get("SCORER_BATCH_SIZE", "10"))
+# Candidatos que pasan el pre-filtro local al scoring con Gemini (0 = todos los alcanzables).
+# Cada tema puede sobrescribirlo con prefilter_top_k en topics.yml.
+SCORER_PREFILTER_TOP_K = int(os.environ.get("SCORER_PREFILTER_TOP_K", "40"))
+# Peticiones de scoring simultáneas y corte anticipado (0 = evaluar todos los candidatos).
+SCORER_MAX_CONCURRENCY = int(os.environ.get("SCORER_MAX_CONCURRENCY", "4"))
+SCORER_GOOD_ENOUGH_SCORE = float(os.environ.get("SCORER_GOOD_ENOUGH_SCORE", "0"))
+# Cache persistente del payload crudo de scoring por (url, snippet, tema, lineamientos, modelo).
+SCORE_CACHE_ENABLED = os.environ.get("SCORE_CACHE_ENABLED", "1") == "1"
+SCORE_CACHE_TTL_HOURS = float(os.environ.get("SCORE_CACHE_TTL_HOURS", "72"))
 GEMINI_IMAGE_MODEL = (
     os.environ.get("GEMINI_IMAGE_MODEL", "").strip() or "gemini-2.5-flash-image"
 )
@@ -254,8 +352,26 @@ WP_IMAGE_QUALITY = int(os.environ.get("WP_IMAGE_QUALITY", "90"))
 WP_IMAGE_MAX_KB = int(os.environ.get("WP_IMAGE_MAX_KB", "450"))
 SOURCE_FETCH_ENABLED = os.environ.get("SOURCE_FETCH_ENABLED", "1") == "1"
 SOURCE_FETCH_MAX_CHARS = int(os.environ.get("SOURCE_FETCH_MAX_CHARS", "15000"))
+# Tope de bytes descargados por página fuente (la descarga se corta al superarlo)
+SOURCE_FETCH_MAX_BYTES = int(os.environ.get("SOURCE_FETCH_MAX_BYTES", "2000000"))
+# Candidatos mejor puntuados cuya fuente se descarga en paralelo antes de redactar
+SOURCE_PREFETCH_TOP_N = int(os.environ.get("SOURCE_PREFETCH_TOP_N", "3"))
+# Mínimo de caracteres de texto de fuente para considerar un candidato utilizable
+SOURCE_MIN_TEXT_CHARS = int(os.environ.get("SOURCE_MIN_TEXT_CHARS", "800"))
+# Cache de extracciones de fuentes en data/sources: vigencia sin revalidar y tamaño máximo
+SOURCE_CACHE_TTL_HOURS = float(os.environ.get("SOURCE_CACHE_TTL_HOURS", "24"))
+SOURCE_CACHE_MAX_MB = float(os.environ.get("SOURCE_CACHE_MAX_MB", "100"))
+# Backend de parseo HTML: auto (lxml si está instalado), lxml o html.parser
+HTML_PARSER = os.environ.get("HTML_PARSER", "auto").strip().lower()
 LINK_VALIDATION_ENABLED = os.environ.get("LINK_VALIDATION_ENABLED", "1") == "1"
 LINK_CHECK_TIMEOUT = int(os.environ.get("LINK_CHECK_TIMEOUT", "8"))
+# Validación concurrente de enlaces: conexiones totales, por host y límite global del paso
+LINK_CHECK_MAX_CONCURRENCY = int(os.environ.get("LINK_CHECK_MAX_CONCURRENCY", "8"))
+LINK_CHECK_PER_HOST = int(os.environ.get("LINK_CHECK_PER_HOST", "2"))
+LINK_CHECK_DEADLINE_SECONDS = float(os.environ.get("LINK_CHECK_DEADLINE_SECONDS", "20"))
+# Cache persistente de salud de enlaces: vigencia de resultados sanos y rotos (horas)
+LINK_HEALTH_OK_TTL_HOURS = float(os.environ.get("LINK_HEALTH_OK_TTL_HOURS", "72"))
+LINK_HEALTH_BROKEN_TTL_HOURS = float(os.environ.get("LINK_HEALTH_BROKEN_TTL_HOURS", "6"))
 RECENT_POSTS_GALLERY_COUNT = int(os.environ.get("RECENT_POSTS_GALLERY_COUNT", "4"))
 PREFERRED_EXTERNAL_LINK_EVERY = int(os.environ.get("PREFERRED_EXTERNAL_LINK_EVERY", "3"))
 PREFERRED_EXTERNAL_LINKS = [
@@ -276,15 +392,21 @@ TOPIC_IDS = [
     if t.strip()
 ]
 TOPICS_MAX_POSTS_PER_RUN = int(os.environ.get("TOPICS_MAX_POSTS_PER_RUN", "1"))
+# Topics cuya búsqueda + scoring corren en paralelo (1 = modo secuencial clásico)
+TOPICS_CONCURRENCY = int(os.environ.get("TOPICS_CONCURRENCY", "1"))
 MIN_DRAFT_BUFFER = int(os.environ.get("MIN_DRAFT_BUFFER", "0"))
 # Techo de borradores sin publicar en WordPress. Si la cola alcanza este número,
 # el pipeline NO genera nada hasta que se despeje. 0 = sin techo (desactivado).
 MAX_DRAFT_BACKLOG = int(os.environ.get("MAX_DRAFT_BACKLOG", "0"))
 PUBLISH_INTERVAL_DAYS = int(os.environ.get("PUBLISH_INTERVAL_DAYS", "7"))
 # Generador de cuadernillos (fuente del diplomado, runner aparte). Tope conservador
-# por corrida y pausa entre cuadernillos para no saturar las APIs.
+# por corrida y materias procesadas en paralelo.
 CUADERNILLOS_MAX_PER_RUN = int(os.environ.get("CUADERNILLOS_MAX_PER_RUN", "10"))
-CUADERNILLOS_THROTTLE_SECONDS = float(os.environ.get("CUADERNILLOS_THROTTLE_SECONDS", "4"))
+CUADERNILLOS_CONCURRENCY = int(os.environ.get("CUADERNILLOS_CONCURRENCY", "1"))
+# Limitadores por servicio compartidos entre hilos (0 = sin límite)
+GEMINI_TEXT_RPM = float(os.environ.get("GEMINI_TEXT_RPM", "30"))
+GEMINI_IMAGE_RPM = float(os.environ.get("GEMINI_IMAGE_RPM", "10"))
+WP_REQUESTS_PER_SECOND = float(os.environ.get("WP_REQUESTS_PER_SECOND", "5"))
 DB_PATH = DATA_DIR / "blog_state.db"
 WP_SITE_DOMAIN = (urlparse(WP_SITE_URL).netloc or "").lower()
 INTERNAL_LINKS = [
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import re
@@ -13,7 +14,10 @@ from google import genai
 from jinja2 import Environment, FileSystemLoader
 
 import config
+from html_doc import HtmlDocument
+from ratelimit import service_limiter
 from search import SearchResult
+from term_matcher import TermHit, TermMatcher
 
 logger = logging.getLogger(__name__)
 POST_SCHEMA = {
@@ -136,18 +140,13 @@ def _render_prompt(
     )
 
 
-def _count_words_html(html: str) -> int:
+def _count_words_html(html: str | HtmlDocument) -> int:
     """Rough word count stripping HTML tags."""
-    from bs4 import BeautifulSoup
+    return len(_html_to_text(html).split())
 
-    text = BeautifulSoup(html, "html.parser").get_text(separator=" ")
-    return len(text.split())
 
-
-def _html_to_text(html: str) -> str:
-    from bs4 import BeautifulSoup
-
-    return BeautifulSoup(html, "html.parser").get_text(separator=" ")
+def _html_to_text(html: str | HtmlDocument) -> str:
+    return HtmlDocument.coerce(html).text
 
 
 def _clean_spaces(text: str) -> str:
@@ -277,20 +276,9 @@ def _max_base_len_with_site_suffix(max_len: int) -> int:
     return max(15, max_len - suffix_len)
 
 
-def _find_blocked_term(text: str) -> str | None:
-    haystack = _normalize_for_compare(text)
-    tokens = set(haystack.split())
-    for term in config.BLOCKED_MENTION_TERMS:
-        needle = _normalize_for_compare(term)
-        if not needle:
-            continue
-        if len(needle) <= 3 and " " not in needle:
-            if needle in tokens:
-                return term
-            continue
-        if needle in haystack:
-            return term
-    return None
+@functools.lru_cache(maxsize=4)
+def _blocked_mention_matcher(terms: tuple[str, ...]) -> TermMatcher:
+    return TermMatcher(terms, normalize=_normalize_for_compare)
 
 
 def _is_internal_href(href: str) -> bool:
@@ -309,15 +297,8 @@ def _is_internal_href(href: str) -> bool:
     return host == site or host.endswith(f".{site}")
 
 
-def _count_internal_links(html: str) -> int:
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html or "", "html.parser")
-    count = 0
-    for a in soup.find_all("a", href=True):
-        if _is_internal_href(a.get("href", "")):
-            count += 1
-    return count
+def _count_internal_links(html: str | HtmlDocument) -> int:
+    return sum(1 for href in HtmlDocument.coerce(html).hrefs if _is_internal_href(href))
 
 
 def _link_label(url: str) -> str:
@@ -351,26 +332,23 @@ def _ensure_internal_links(body: str) -> str:
     return (body or "").rstrip() + block
 
 
-def _contains_blocked_mentions(post: GeneratedPost) -> str | None:
-    candidates = [
-        post.title,
-        post.body,
-        post.excerpt,
-        _strip_site_suffix(post.seo_title),
-        post.seo_description,
-        post.focus_keyphrase,
-        _strip_site_suffix(post.og_title),
-        post.og_description,
-        _strip_site_suffix(post.twitter_title),
-        post.twitter_description,
-        post.image_alt_text,
-        " ".join(post.tags),
-    ]
-    for text in candidates:
-        blocked = _find_blocked_term(text)
-        if blocked:
-            return blocked
-    return None
+def _blocked_mention_hits(post: GeneratedPost) -> list[TermHit]:
+    """Every blocked term in the post's public fields, scanned in one pass."""
+    fields = {
+        "title": post.title,
+        "body": post.body,
+        "excerpt": post.excerpt,
+        "seo_title": _strip_site_suffix(post.seo_title),
+        "seo_description": post.seo_description,
+        "focus_keyphrase": post.focus_keyphrase,
+        "og_title": _strip_site_suffix(post.og_title),
+        "og_description": post.og_description,
+        "twitter_title": _strip_site_suffix(post.twitter_title),
+        "twitter_description": post.twitter_description,
+        "image_alt_text": post.image_alt_text,
+        "tags": " ".join(post.tags),
+    }
+    return _blocked_mention_matcher(tuple(config.BLOCKED_MENTION_TERMS)).scan(fields)
 
 
 def _extract_focus_keyphrase(data: dict, title: str, plain_text: str, tags: list[str]) -> str:
@@ -410,17 +388,14 @@ def _ensure_exact_phrase(text: str, phrase: str, max_len: int) -> str:
     return f"{phrase}: {_truncate(base, remaining, add_ellipsis=True)}"
 
 
-def _body_has_keyphrase_in_subheading(body: str, keyphrase: str) -> bool:
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(body or "", "html.parser")
-    for heading in soup.find_all(["h2", "h3"]):
-        if _contains_exact_phrase(heading.get_text(" ", strip=True), keyphrase):
-            return True
-    return False
+def _body_has_keyphrase_in_subheading(body: str | HtmlDocument, keyphrase: str) -> bool:
+    return any(
+        _contains_exact_phrase(heading, keyphrase)
+        for heading in HtmlDocument.coerce(body).subheadings
+    )
 
 
-def _align_focus_keyphrase(post: GeneratedPost) -> GeneratedPost:
+def _align_focus_keyphrase(post: GeneratedPost, body_doc: HtmlDocument | None = None) -> GeneratedPost:
     if not post.focus_keyphrase:
         return post
 
@@ -446,7 +421,8 @@ def _align_focus_keyphrase(post: GeneratedPost) -> GeneratedPost:
         config.SOCIAL_DESCRIPTION_MAX_LEN,
     )
 
-    body_text = _html_to_text(post.body)
+    doc = body_doc if body_doc is not None else HtmlDocument(post.body)
+    body_text = _html_to_text(doc)
     if not _contains_exact_phrase(body_text, post.focus_keyphrase):
         intro = (
             f"<p><strong>{post.focus_keyphrase}</strong> "
@@ -454,7 +430,8 @@ def _align_focus_keyphrase(post: GeneratedPost) -> GeneratedPost:
             "en decisiones pedagógicas concretas.</p>\n"
         )
         post.body = intro + (post.body or "").lstrip()
-    if not _body_has_keyphrase_in_subheading(post.body, post.focus_keyphrase):
+    # The intro above is a plain <p>, so the parsed subheadings are still current.
+    if not _body_has_keyphrase_in_subheading(doc, post.focus_keyphrase):
         section = (
             f"\n<h2>{post.focus_keyphrase} en la práctica educativa</h2>\n"
             "<p>Este enfoque ayuda a traducir los hallazgos del artículo en "
@@ -464,14 +441,16 @@ def _align_focus_keyphrase(post: GeneratedPost) -> GeneratedPost:
     return post
 
 
-def _normalize_generated_post(data: dict) -> GeneratedPost:
+def _normalize_generated_post(data: dict, body_doc: HtmlDocument | None = None) -> GeneratedPost:
     title = _truncate(
         data.get("title", "Actualidad Montessori Internacional"),
         config.POST_TITLE_MAX_LEN,
     )
 
     body = data.get("body", "")
-    plain_text = _html_to_text(body)
+    if body_doc is None:
+        body_doc = HtmlDocument(body)
+    plain_text = _html_to_text(body_doc)
 
     excerpt = _truncate(
         data.get("excerpt", "") or plain_text,
@@ -563,7 +542,7 @@ def _normalize_generated_post(data: dict) -> GeneratedPost:
         image_prompt=_clean_spaces(data.get("image_prompt", "")),
         image_alt_text=image_alt_text,
     )
-    return _align_focus_keyphrase(post)
+    return _align_focus_keyphrase(post, body_doc)
 
 
 def _build_retry_guidance(last_error: str | None) -> str:
@@ -614,6 +593,7 @@ def generate_post(
     for attempt in range(max_retries):
         try:
             prompt = base_prompt + _build_retry_guidance(last_error)
+            service_limiter("gemini_text", config.GEMINI_TEXT_RPM / 60).acquire()
             response = client.models.generate_content(
                 model=config.GEMINI_CONTENT_MODEL,
                 contents=prompt,
@@ -632,8 +612,8 @@ def generate_post(
                         text = text[:-3]
                     text = text.strip()
                 data = json.loads(text)
-            body = data.get("body", "")
-            word_count = _count_words_html(body)
+            body_doc = HtmlDocument(data.get("body", ""))
+            word_count = _count_words_html(body_doc)
 
             if word_count < config.MIN_BODY_WORDS:
                 logger.warning(
@@ -647,13 +627,15 @@ def generate_post(
                     continue
                 return None
 
-            post = _normalize_generated_post(data)
-            blocked = _contains_blocked_mentions(post)
-            if blocked:
+            post = _normalize_generated_post(data, body_doc)
+            hits = _blocked_mention_hits(post)
+            if hits:
+                blocked = hits[0].term
                 logger.warning(
-                    "Attempt %d: post contains blocked term '%s', retrying/aborting",
+                    "Attempt %d: post contains blocked term '%s' (%s), retrying/aborting",
                     attempt + 1,
                     blocked,
+                    ", ".join(f"{hit.term}@{hit.field}" for hit in hits),
                 )
                 last_error = f"blocked:{blocked}"
                 if attempt < max_retries - 1:
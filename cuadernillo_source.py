@@ -23,6 +23,13 @@ logger = logging.getLogger(__name__)
 
 MAP_FILE = config.BASE_DIR / "cuadernillos_map.yml"
 MAX_SOURCE_CHARS = 6000
+# Checkpoint de run_cuadernillos: el cuadernillo se está generando. Si la corrida
+# se interrumpe, sigue contando como pendiente y se retoma en la siguiente.
+STATUS_IN_PROGRESS = "cuad_in_progress"
+# Checkpoint previo a crear el borrador: guarda el título generado y, en cuanto
+# WordPress responde, el wp_post_id. Al retomar se reutiliza ese borrador en vez
+# de crear otro.
+STATUS_PUBLISHING = "cuad_publishing"
 
 # Anclas de "sesión" en los .md (los AMMAC no son uniformes):
 #   "## Sesión 3: Título"  /  "# Sesión 3 en Classroom"  /  "### S3: Título"
@@ -164,12 +171,11 @@ def iter_cuadernillos(only_pending: bool = True) -> list[Cuadernillo]:
     items = all_cuadernillos()
     if not only_pending:
         return items
-    pending: list[Cuadernillo] = []
-    for it in items:
-        done = state.get_all_processed_urls(topic_id=it.topic_id)
-        if it.pseudo_url not in done:
-            pending.append(it)
-    return pending
+    done = state.filter_processed(
+        [(it.topic_id, it.pseudo_url) for it in items],
+        exclude_statuses=(STATUS_IN_PROGRESS, STATUS_PUBLISHING),
+    )
+    return [it for it in items if (it.topic_id, it.pseudo_url) not in done]
 
 
 def coverage_report() -> dict:
@@ -0,0 +1,262 @@
+"""Documento HTML parseado una sola vez y compartido por content, seo_rules y link_optimizer.
+
+Cada vista derivada (texto, párrafos, encabezados, enlaces, imágenes) se calcula
+al primer acceso y queda en caché hasta que alguien modifica el árbol y llama a
+``mutated()``.
+
+``make_soup`` elige el backend de parseo: lxml (C) si está instalado y
+``HTML_PARSER`` lo permite, o ``html.parser`` de la stdlib en otro caso.
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import importlib.util
+import logging
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from bs4 import BeautifulSoup
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_HIDDEN_TAGS = ["script", "style", "noscript"]
+_MEDIA_TAGS = ["img", "video", "iframe"]
+_SUBHEADING_TAGS = ["h2", "h3"]
+_BENCH_CHUNK_BYTES = 4096
+# Saved source pages used by ``--parity`` / ``--bench`` when no files are given.
+SOURCE_PAGES_DIR = Path(__file__).resolve().parent / "assets" / "source_pages"
+
+
+def _lxml_available() -> bool:
+    return importlib.util.find_spec("lxml") is not None
+
+
+@functools.lru_cache(maxsize=1)
+def parser_backend() -> str:
+    """BeautifulSoup feature name used for full, read-only documents."""
+    if config.HTML_PARSER == "html.parser":
+        return "html.parser"
+    if _lxml_available():
+        return "lxml"
+    if config.HTML_PARSER == "lxml":
+        logger.warning("HTML_PARSER=lxml pero lxml no está instalado; se usa html.parser")
+    return "html.parser"
+
+
+def make_soup(html: str, *, fragment: bool = False) -> BeautifulSoup:
+    """Parse ``html`` with the configured backend.
+
+    Fragments that get edited and serialized back (post bodies, appended
+    sections) always use ``html.parser``: lxml wraps them in
+    ``<html><body>`` and would change the markup sent to WordPress.
+    """
+    features = "html.parser" if fragment else parser_backend()
+    return BeautifulSoup(html or "", features)
+
+
+class HtmlDocument:
+    """Lazily parsed HTML body with cached derived views."""
+
+    def __init__(self, html: str = ""):
+        self._html: str | None = html or ""
+        self._soup: BeautifulSoup | None = None
+        self._cache: dict[str, object] = {}
+
+    @classmethod
+    def coerce(cls, value: "str | HtmlDocument | None") -> "HtmlDocument":
+        """Return ``value`` unchanged if it is already a document, else parse it."""
+        if isinstance(value, HtmlDocument):
+            return value
+        return cls(value or "")
+
+    def __str__(self) -> str:
+        return self.html
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = str(self._soup)
+        return self._html
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = make_soup(self._html or "", fragment=True)
+        return self._soup
+
+    def mutated(self) -> None:
+        """Call after editing ``soup`` in place: drops cached views and serialization."""
+        if self._soup is not None:
+            # Re-merge strings split by unwrap()/append() so text views match a fresh parse.
+            self._soup.smooth()
+        self._html = None
+        self._cache.clear()
+
+    def _cached(self, key: str, compute: Callable[[], _T]) -> _T:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]  # type: ignore[return-value]
+
+    @property
+    def text(self) -> str:
+        """All text nodes joined with spaces (``get_text(" ")``)."""
+        return self._cached("text", lambda: self.soup.get_text(separator=" "))
+
+    @property
+    def visible_text(self) -> str:
+        """Stripped text without script/style/noscript content."""
+
+        def compute() -> str:
+            soup = self.soup
+            if not soup.find(_HIDDEN_TAGS):
+                return soup.get_text(separator=" ", strip=True)
+            clone = copy.copy(soup)
+            for tag in clone(_HIDDEN_TAGS):
+                tag.decompose()
+            return clone.get_text(separator=" ", strip=True)
+
+        return self._cached("visible_text", compute)
+
+    @property
+    def paragraphs(self) -> list[str]:
+        return self._cached(
+            "paragraphs",
+            lambda: [p.get_text(" ", strip=True) for p in self.soup.find_all("p")],
+        )
+
+    @property
+    def first_paragraph(self) -> str:
+        paragraphs = self.paragraphs
+        return paragraphs[0] if paragraphs else ""
+
+    @property
+    def subheadings(self) -> list[str]:
+        """Text of every h2/h3, in document order."""
+        return self._cached(
+            "subheadings",
+            lambda: [h.get_text(" ", strip=True) for h in self.soup.find_all(_SUBHEADING_TAGS)],
+        )
+
+    @property
+    def hrefs(self) -> list[str]:
+        """Stripped ``href`` of every anchor that has one."""
+        return self._cached(
+            "hrefs",
+            lambda: [(a.get("href") or "").strip() for a in self.soup.find_all("a", href=True)],
+        )
+
+    @property
+    def image_alts(self) -> list[str]:
+        return self._cached(
+            "image_alts",
+            lambda: [img.get("alt") or "" for img in self.soup.find_all("img")],
+        )
+
+    @property
+    def has_media(self) -> bool:
+        return self._cached("has_media", lambda: bool(self.soup.find(_MEDIA_TAGS)))
+
+
+def _extract_views(html: str, features: str) -> dict[str, object]:
+    """Title, source text, meta, links and headings as extracted with ``features``."""
+    from source_fetch import _extract_meta, _extract_text
+
+    soup = BeautifulSoup(html, features)
+    title = " ".join(soup.title.get_text().split()) if soup.title else ""
+    hrefs = [(a.get("href") or "").strip() for a in soup.find_all("a", href=True)]
+    headings = [h.get_text(" ", strip=True) for h in soup.find_all(["h1", "h2", "h3"])]
+    meta = _extract_meta(soup)
+    text = _extract_text(soup, config.SOURCE_FETCH_MAX_CHARS)
+    return {"titulo": title, "texto": text, "meta": meta, "enlaces": hrefs, "encabezados": headings}
+
+
+def _stream_views(html: str) -> dict[str, object]:
+    """Text and meta from the streaming extractor, fed in network-sized chunks."""
+    import codecs
+
+    from source_fetch import _StreamExtractor
+
+    raw = html.encode("utf-8")
+    streamed = _StreamExtractor(config.SOURCE_FETCH_MAX_CHARS)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for start in range(0, len(raw), _BENCH_CHUNK_BYTES):
+        streamed.feed(decoder.decode(raw[start:start + _BENCH_CHUNK_BYTES]))
+    streamed.feed(decoder.decode(b"", final=True))
+    streamed.close()
+    return {"texto": streamed.text(), "meta": (streamed.published_at, streamed.author)}
+
+
+def _source_pages(paths: list[str]) -> list[Path]:
+    return [Path(p) for p in paths] if paths else sorted(SOURCE_PAGES_DIR.glob("*.html"))
+
+
+def check_parity(paths: list[str] | None = None) -> bool:
+    """Compare every backend (and the stream extractor) against html.parser.
+
+    Defaults to the saved corpus in assets/source_pages. Returns False on
+    any difference.
+    """
+    pages = _source_pages(paths or [])
+    if not _lxml_available():
+        print("lxml no está instalado: solo se compara html.parser con el extractor en streaming")
+    ok = True
+    for path in pages:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        base = _extract_views(html, "html.parser")
+        candidates = [("stream", _stream_views(html))]
+        if _lxml_available():
+            candidates.insert(0, ("lxml", _extract_views(html, "lxml")))
+        for label, views in candidates:
+            for field, value in views.items():
+                same = value == base[field]
+                ok = ok and same
+                print(f"{path.name} [{label}] {field}: {'OK' if same else 'DIFIERE'}")
+                if not same:
+                    print(f"  html.parser: {base[field]!r}\n  {label}: {value!r}")
+    return ok
+
+
+def _benchmark_backends(paths: list[str], rounds: int = 20) -> None:
+    """Compare parser backends (and the streaming extractor) on saved article HTML."""
+    import time
+
+    backends = ["html.parser"] + (["lxml"] if _lxml_available() else [])
+    if len(backends) == 1:
+        print("lxml no está instalado: solo se mide html.parser (pip install lxml)")
+
+    for path in _source_pages(paths):
+        html = path.read_text(encoding="utf-8", errors="replace")
+        for features in backends:
+            _extract_views(html, features)
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                _extract_views(html, features)
+            elapsed_ms = (time.perf_counter() - t0) / rounds * 1000
+            print(f"{path} [{features}]: {elapsed_ms:.2f} ms ({len(html)} chars)")
+
+        # Streaming extractor used by source_fetch.enrich_article (text + meta only).
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            _stream_views(html)
+        elapsed_ms = (time.perf_counter() - t0) / rounds * 1000
+        print(f"{path} [stream]: {elapsed_ms:.2f} ms ({len(html)} chars)")
+    check_parity(paths)
+
+
+if __name__ == "__main__":
+    import sys
+
+    config.setup_logging()
+    files = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--bench" in sys.argv:
+        _benchmark_backends(files)
+        sys.exit(0)
+    if "--parity" in sys.argv:
+        sys.exit(0 if check_parity(files) else 1)
+    print("Backend HTML:", parser_backend())
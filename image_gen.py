@@ -3,6 +3,7 @@
 import io
 import logging
 import time
+import uuid
 from pathlib import Path
 
 from google import genai
@@ -10,6 +11,7 @@ from PIL import Image, ImageOps
 
 import branding
 import config
+from ratelimit import service_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,7 @@ def generate_cover_image(
 
     for attempt in range(max_retries):
         try:
+            service_limiter("gemini_image", config.GEMINI_IMAGE_RPM / 60).acquire()
             response = client.models.generate_content(
                 model=MODEL,
                 contents=full_prompt,
@@ -92,8 +95,9 @@ def generate_cover_image(
                     img = _prepare_cover_image(source_img)
                     img = branding.apply_brand_look(img, kit)
 
+                    # Concurrent runs (CUADERNILLOS_CONCURRENCY) can finish in the same second.
                     timestamp = int(time.time())
-                    output_path = output_dir / f"cover_{timestamp}.jpg"
+                    output_path = output_dir / f"cover_{timestamp}_{uuid.uuid4().hex[:12]}.jpg"
                     _save_optimized_jpeg(img, output_path)
 
                     size_kb = output_path.stat().st_size / 1024
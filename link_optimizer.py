@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from html import escape
 from urllib.parse import urljoin, urlparse
 
@@ -10,9 +14,14 @@ import httpx
 from bs4 import BeautifulSoup
 
 import config
+import state
+from html_doc import HtmlDocument, make_soup
 
 logger = logging.getLogger(__name__)
 
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+
 _SECTION_TITLES = {
     "publicaciones recientes",
     "recursos internos recomendados",
@@ -66,22 +75,147 @@ def _canonical_internal_key(url: str) -> str:
     return f"{parsed.netloc.lower()}{path}"
 
 
-def _check_url_ok(url: str, cache: dict[str, bool], timeout: int) -> bool:
-    if url in cache:
-        return cache[url]
-    if not _is_public_http_url(url):
-        cache[url] = False
-        return False
+def _get_client() -> httpx.Client:
+    """Return the shared keep-alive client used for link checks."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(
+                timeout=config.LINK_CHECK_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=config.LINK_CHECK_MAX_CONCURRENCY,
+                    max_keepalive_connections=config.LINK_CHECK_MAX_CONCURRENCY,
+                ),
+            )
+            atexit.register(close_client)
+        return _CLIENT
+
+
+def close_client() -> None:
+    """Close the shared link-check client (safe to call more than once)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
+def _declared_body_size(resp: httpx.Response) -> int:
+    """Full size of the target as advertised by Content-Range or Content-Length."""
+    content_range = resp.headers.get("content-range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1].strip()
+        return int(total) if total.isdigit() else 0
+    length = resp.headers.get("content-length", "")
+    return int(length) if length.isdigit() else 0
+
+
+def _check_url(url: str, timeout: float) -> tuple[bool, int, str, int]:
+    """Return (ok, status_code, final_url, bytes_saved).
+
+    Status 0 means the request itself failed. When HEAD is rejected, the
+    fallback asks for a single byte and closes the stream without reading
+    it, so PDFs and videos are never downloaded; ``bytes_saved`` is the body
+    size the server advertised for that skipped download.
+    """
     try:
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            resp = client.head(url)
-            if not (200 <= resp.status_code < 400):
-                resp = client.get(url)
-            ok = 200 <= resp.status_code < 400
+        client = _get_client()
+        resp = client.head(url, timeout=timeout)
+        if 200 <= resp.status_code < 400:
+            return True, resp.status_code, str(resp.url), 0
+        with client.stream("GET", url, headers={"Range": "bytes=0-0"}, timeout=timeout) as resp:
+            # 416 means the resource exists but is empty, so the link is fine.
+            ok = 200 <= resp.status_code < 400 or resp.status_code == 416
+            return ok, resp.status_code, str(resp.url), _declared_body_size(resp)
     except Exception:
-        ok = False
-    cache[url] = ok
-    return ok
+        return False, 0, "", 0
+
+
+def _cached_link_health(urls: list[str]) -> dict[str, bool]:
+    try:
+        return state.get_link_health(
+            urls,
+            ok_max_age_seconds=config.LINK_HEALTH_OK_TTL_HOURS * 3600,
+            broken_max_age_seconds=config.LINK_HEALTH_BROKEN_TTL_HOURS * 3600,
+        )
+    except Exception as exc:
+        logger.warning("No se pudo leer cache de salud de enlaces: %s", exc)
+        return {}
+
+
+def _validate_urls(urls: list[str]) -> tuple[dict[str, bool], int]:
+    """Check ``urls`` concurrently under per-host caps and one global deadline.
+
+    Checks still unfinished when LINK_CHECK_DEADLINE_SECONDS expires count as
+    broken, so one slow host cannot stall the whole step. Returns the
+    results plus the body bytes skipped by the ranged GET fallback.
+    """
+    results: dict[str, bool] = {}
+    public: list[str] = []
+    for url in dict.fromkeys(urls):
+        if _is_public_http_url(url):
+            public.append(url)
+        else:
+            results[url] = False
+    fresh = _cached_link_health(public)
+    results.update(fresh)
+    pending = [url for url in public if url not in fresh]
+    if public:
+        logger.info(
+            "Salud de enlaces: %d en cache, %d a validar", len(public) - len(pending), len(pending),
+        )
+    if not pending:
+        return results, 0
+
+    deadline = time.monotonic() + config.LINK_CHECK_DEADLINE_SECONDS
+    host_slots: dict[str, threading.BoundedSemaphore] = {}
+    slots_lock = threading.Lock()
+
+    def check(url: str) -> tuple[bool, int, str, int] | None:
+        host = (urlparse(url).netloc or "").lower()
+        with slots_lock:
+            slot = host_slots.setdefault(
+                host, threading.BoundedSemaphore(config.LINK_CHECK_PER_HOST)
+            )
+        with slot:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            return _check_url(url, timeout=min(config.LINK_CHECK_TIMEOUT, remaining))
+
+    workers = max(1, min(len(pending), config.LINK_CHECK_MAX_CONCURRENCY))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="linkcheck")
+    try:
+        futures = {pool.submit(check, url): url for url in pending}
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        checked: list[tuple[str, bool, int, str]] = []
+        bytes_saved = 0
+        for future in done:
+            url = futures[future]
+            outcome = future.result()
+            results[url] = bool(outcome and outcome[0])
+            if outcome is not None:
+                ok, status_code, final_url, saved = outcome
+                checked.append((url, ok, status_code, final_url))
+                bytes_saved += saved
+        # Deadline misses are treated as broken for this post but not persisted:
+        # they say nothing about the link itself.
+        for future in not_done:
+            future.cancel()
+            results[futures[future]] = False
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    try:
+        state.save_link_health(checked)
+    except Exception as exc:
+        logger.warning("No se pudo guardar salud de enlaces: %s", exc)
+    if not_done:
+        logger.warning(
+            "Validación de enlaces: %d de %d URLs sin respuesta antes del límite de %ss",
+            len(not_done), len(pending), config.LINK_CHECK_DEADLINE_SECONDS,
+        )
+    return results, bytes_saved
 
 
 def _remove_existing_sections(soup: BeautifulSoup) -> None:
@@ -183,16 +317,20 @@ def _build_preferred_external_html(url: str) -> str:
 
 def sanitize_and_enrich_body(
     *,
-    html: str,
+    html: str | HtmlDocument,
     source_url: str = "",
     recent_posts: list[dict] | None = None,
     preferred_external_url: str = "",
 ) -> tuple[str, dict]:
-    """Remove broken links and append reliable internal/external sections."""
-    soup = BeautifulSoup(html or "", "html.parser")
+    """Remove broken links and append reliable internal/external sections.
+
+    When given an ``HtmlDocument`` the tree is edited in place, so callers can
+    hand the same document to the SEO checks without parsing the body again.
+    """
+    doc = HtmlDocument.coerce(html)
+    soup = doc.soup
     _remove_existing_sections(soup)
 
-    link_cache: dict[str, bool] = {}
     internal_count = 0
     external_count = 0
     removed_links = 0
@@ -211,9 +349,47 @@ def sanitize_and_enrich_body(
         if normalized and _is_internal_url(normalized):
             trusted_internal_urls.add(_canonical_internal_key(normalized))
 
-    for anchor in soup.find_all("a", href=True):
-        href = (anchor.get("href") or "").strip()
-        normalized = _normalize_absolute_url(href)
+    # First pass: collect every URL that needs a network check, without touching the DOM.
+    anchors = [
+        (anchor, _normalize_absolute_url((anchor.get("href") or "").strip()))
+        for anchor in soup.find_all("a", href=True)
+    ]
+    urls_to_check = [
+        normalized
+        for _, normalized in anchors
+        if normalized
+        and not normalized.startswith(("#", "mailto:", "tel:"))
+        and not _is_internal_url(normalized)
+    ]
+    candidate_recent: list[dict] = []
+    for recent in recent_posts or []:
+        raw_url = str(recent.get("url", "")).strip()
+        if not raw_url:
+            continue
+        normalized_url = _normalize_absolute_url(raw_url)
+        if not normalized_url or not _is_internal_url(normalized_url):
+            continue
+        clean_recent = dict(recent)
+        clean_recent["url"] = normalized_url
+        image_url = str(clean_recent.get("image_url", "")).strip()
+        if image_url:
+            urls_to_check.append(image_url)
+        candidate_recent.append(clean_recent)
+    if source_url and _is_public_http_url(source_url):
+        urls_to_check.append(source_url)
+    if preferred_external_url:
+        urls_to_check.append(preferred_external_url)
+
+    link_ok: dict[str, bool] = {}
+    bytes_saved = 0
+    if config.LINK_VALIDATION_ENABLED:
+        link_ok, bytes_saved = _validate_urls(urls_to_check)
+
+    def url_ok(url: str) -> bool:
+        return link_ok.get(url, False) if config.LINK_VALIDATION_ENABLED else True
+
+    # Second pass: apply the results to the DOM.
+    for anchor, normalized in anchors:
         if not normalized:
             anchor.unwrap()
             removed_links += 1
@@ -231,10 +407,7 @@ def sanitize_and_enrich_body(
             internal_count += 1
             continue
 
-        is_ok = True
-        if config.LINK_VALIDATION_ENABLED:
-            is_ok = _check_url_ok(normalized, link_cache, config.LINK_CHECK_TIMEOUT)
-        if not is_ok:
+        if not url_ok(normalized):
             anchor.unwrap()
             removed_links += 1
             continue
@@ -246,27 +419,15 @@ def sanitize_and_enrich_body(
             external_domains.add(domain)
 
     valid_recent_posts: list[dict] = []
-    for recent in recent_posts or []:
-        raw_url = str(recent.get("url", "")).strip()
-        if not raw_url:
-            continue
-        normalized_url = _normalize_absolute_url(raw_url)
-        if not normalized_url or not _is_internal_url(normalized_url):
-            continue
-        clean_recent = dict(recent)
-        clean_recent["url"] = normalized_url
+    for clean_recent in candidate_recent:
         image_url = str(clean_recent.get("image_url", "")).strip()
-        if image_url:
-            image_ok = True
-            if config.LINK_VALIDATION_ENABLED:
-                image_ok = _check_url_ok(image_url, link_cache, config.LINK_CHECK_TIMEOUT)
-            if not image_ok:
-                clean_recent["image_url"] = ""
+        if image_url and not url_ok(image_url):
+            clean_recent["image_url"] = ""
         valid_recent_posts.append(clean_recent)
 
     gallery_html = _build_recent_gallery_html(valid_recent_posts)
     if gallery_html:
-        soup.append(BeautifulSoup(gallery_html, "html.parser"))
+        soup.append(make_soup(gallery_html, fragment=True))
         internal_count += len(valid_recent_posts)
 
     fallback_internal_count = 0
@@ -281,34 +442,28 @@ def sanitize_and_enrich_body(
                 break
         fallback_html = _build_internal_fallback_html(fallback_links)
         if fallback_html:
-            soup.append(BeautifulSoup(fallback_html, "html.parser"))
+            soup.append(make_soup(fallback_html, fragment=True))
             internal_count += len(fallback_links)
             fallback_internal_count = len(fallback_links)
 
     if source_url and _is_public_http_url(source_url):
         source_domain = (urlparse(source_url).netloc or "").lower()
-        source_ok = True
-        if config.LINK_VALIDATION_ENABLED:
-            source_ok = _check_url_ok(source_url, link_cache, config.LINK_CHECK_TIMEOUT)
-        if source_ok and source_domain not in external_domains and external_count == 0:
+        if url_ok(source_url) and source_domain not in external_domains and external_count == 0:
             source_html = (
                 "<h2>Fuente Externa Consultada</h2>"
                 "<p>"
                 f'<a href="{escape(source_url, quote=True)}">{escape(source_domain)}</a>'
                 "</p>"
             )
-            soup.append(BeautifulSoup(source_html, "html.parser"))
+            soup.append(make_soup(source_html, fragment=True))
             external_count += 1
             external_domains.add(source_domain)
 
     if preferred_external_url:
         preferred_domain = (urlparse(preferred_external_url).netloc or "").lower()
-        preferred_ok = True
-        if config.LINK_VALIDATION_ENABLED:
-            preferred_ok = _check_url_ok(preferred_external_url, link_cache, config.LINK_CHECK_TIMEOUT)
-        if preferred_ok and preferred_domain and preferred_domain not in external_domains:
+        if url_ok(preferred_external_url) and preferred_domain and preferred_domain not in external_domains:
             external_html = _build_preferred_external_html(preferred_external_url)
-            soup.append(BeautifulSoup(external_html, "html.parser"))
+            soup.append(make_soup(external_html, fragment=True))
             external_count += 1
             preferred_added = True
         else:
@@ -316,11 +471,13 @@ def sanitize_and_enrich_body(
     else:
         preferred_added = False
 
-    return str(soup), {
+    doc.mutated()
+    return doc.html, {
         "internal_links": internal_count,
         "external_links": external_count,
         "removed_links": removed_links,
         "gallery_links": len(valid_recent_posts),
         "fallback_internal_links": fallback_internal_count,
         "preferred_external_added": preferred_added,
+        "bytes_saved": bytes_saved,
     }
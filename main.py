@@ -2,12 +2,15 @@
 
 import logging
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 import config
 import state
-from search import search_all
-from scorer import select_best
+from search import SearchPlan, SearchResult, search_all
+from scorer import rank_candidates
 from content import generate_post
 from image_gen import generate_cover_image
 from wordpress import (
@@ -15,12 +18,16 @@ from wordpress import (
     create_draft,
     list_recent_published_posts,
     count_posts_by_status,
+    prefetch_draft_refs,
+    resolve_draft_refs,
 )
-from source_fetch import enrich_article
+from source_fetch import enrich_best_candidate
 from topics import TopicProfile, load_topics
 from seo_rules import analyze_headline, analyze_truseo, build_slug
 from notifier import notify_draft_created
 from link_optimizer import sanitize_and_enrich_body
+from html_doc import HtmlDocument
+from stages import StageGraph
 
 logger = logging.getLogger(__name__)
 
@@ -119,31 +126,50 @@ def _pick_preferred_external_url() -> str:
     return links[rotation_index]
 
 
-def run_topic_pipeline(topic: TopicProfile) -> bool:
-    """Execute full pipeline for one topic. Returns True if a post was created."""
+def discover_topic(
+    topic: TopicProfile,
+    plan: SearchPlan | None = None,
+) -> list[tuple[SearchResult, float]]:
+    """Search and score candidates for one topic (no side effects on WordPress)."""
     logger.info("=== Topic: %s (%s) ===", topic.name, topic.topic_id)
 
     # 1. Search
-    logger.info("=== Paso 1: Búsqueda de noticias ===")
-    results = search_all(queries=topic.queries, topic_id=topic.topic_id)
+    logger.info("=== Paso 1: Búsqueda de noticias [%s] ===", topic.topic_id)
+    results = search_all(queries=topic.queries, topic_id=topic.topic_id, plan=plan)
     if not results:
-        logger.info("No se encontraron noticias nuevas. Finalizando.")
-        return False
+        logger.info("No se encontraron noticias nuevas [%s].", topic.topic_id)
+        return []
 
-    # 2. Score and select best
-    logger.info("=== Paso 2: Evaluación de relevancia (%d artículos) ===", len(results))
-    best = select_best(
+    # 2. Score and rank
+    logger.info(
+        "=== Paso 2: Evaluación de relevancia [%s] (%d artículos) ===",
+        topic.topic_id, len(results),
+    )
+    ranked = rank_candidates(
         results,
         min_score=topic.min_score,
         topic_name=topic.name,
         topic_scoring_guidelines=topic.scoring_guidelines,
+        prefilter_top_k=topic.prefilter_top_k,
     )
-    if best is None:
-        logger.info("Ningún artículo alcanzó el umbral de calidad. Finalizando.")
+    if not ranked:
+        logger.info("Ningún artículo alcanzó el umbral de calidad [%s].", topic.topic_id)
+    return ranked
+
+
+def run_topic_pipeline(topic: TopicProfile, plan: SearchPlan | None = None) -> bool:
+    """Execute full pipeline for one topic. Returns True if a post was created."""
+    return publish_topic(topic, discover_topic(topic, plan))
+
+
+def publish_topic(topic: TopicProfile, ranked: list[tuple[SearchResult, float]]) -> bool:
+    """Enrich, generate and publish the best of ``ranked``. Returns True if a post was created."""
+    if not ranked:
+        logger.info("Sin candidatos para %s. Finalizando.", topic.topic_id)
         return False
-    article, score = best
-    logger.info("=== Paso 2.5: Enriquecimiento de fuente ===")
-    article = enrich_article(article)
+    logger.info("=== Paso 2.5: Enriquecimiento de fuente [%s] ===", topic.topic_id)
+    article, score = enrich_best_candidate(ranked)
+    logger.info("Artículo elegido (score %.2f): %s", score, article.title)
 
     # 3. Generate content
     logger.info("=== Paso 3: Generación de contenido ===")
@@ -165,36 +191,52 @@ def run_topic_pipeline(topic: TopicProfile) -> bool:
     if topic.categories:
         post.categories = topic.categories
 
-    recent_posts: list[dict] = []
-    if config.RECENT_POSTS_GALLERY_COUNT > 0:
-        recent_posts = list_recent_published_posts(limit=config.RECENT_POSTS_GALLERY_COUNT)
+    # 3.5-5. Stages that only need the generated post run concurrently:
+    # cover image | recent posts -> link hygiene -> SEO gate | term/author ids,
+    # and the media upload waits for both the image and a passing SEO gate.
     preferred_external_url = _pick_preferred_external_url()
-    post.body, link_stats = sanitize_and_enrich_body(
-        html=post.body,
-        source_url=article.url,
-        recent_posts=recent_posts,
-        preferred_external_url=preferred_external_url,
-    )
-    logger.info(
-        (
-            "Link hygiene [%s]: internos=%d, externos=%d, "
-            "gallery_items=%d, links_removidos=%d, preferred_external=%s, preferred_added=%s"
-        ),
-        topic.topic_id,
-        link_stats.get("internal_links", 0),
-        link_stats.get("external_links", 0),
-        link_stats.get("gallery_links", 0),
-        link_stats.get("removed_links", 0),
-        preferred_external_url or "none",
-        link_stats.get("preferred_external_added", False),
-    )
+    body_doc = HtmlDocument(post.body)
+    graph = StageGraph(name=f"stages-{topic.topic_id}")
+
+    def stage_image() -> Path | None:
+        logger.info("=== Paso 4: Generación de imagen de portada ===")
+        return generate_cover_image(post.image_prompt, brand_id=topic.brand_kit)
+
+    def stage_recent_posts() -> list[dict]:
+        if config.RECENT_POSTS_GALLERY_COUNT <= 0:
+            return []
+        return list_recent_published_posts(limit=config.RECENT_POSTS_GALLERY_COUNT)
+
+    def stage_links(recent_posts: list[dict]) -> dict:
+        post.body, link_stats = sanitize_and_enrich_body(
+            html=body_doc,
+            source_url=article.url,
+            recent_posts=recent_posts,
+            preferred_external_url=preferred_external_url,
+        )
+        logger.info(
+            (
+                "Link hygiene [%s]: internos=%d, externos=%d, "
+                "gallery_items=%d, links_removidos=%d, preferred_external=%s, preferred_added=%s, "
+                "bytes_ahorrados=%d"
+            ),
+            topic.topic_id,
+            link_stats.get("internal_links", 0),
+            link_stats.get("external_links", 0),
+            link_stats.get("gallery_links", 0),
+            link_stats.get("removed_links", 0),
+            preferred_external_url or "none",
+            link_stats.get("preferred_external_added", False),
+            link_stats.get("bytes_saved", 0),
+        )
+        return link_stats
 
-    # 3.5 Local SEO gate (TruSEO-like + Headline) without AIOSEO API.
-    truseo_score = None
-    headline_score = None
-    if config.LOCAL_SEO_RULES_ENABLED:
+    def stage_seo(_link_stats: dict) -> tuple[int | None, int | None]:
+        # Local SEO gate (TruSEO-like + Headline) without AIOSEO API.
+        if not config.LOCAL_SEO_RULES_ENABLED:
+            return None, None
         truseo_report = analyze_truseo(
-            html=post.body,
+            html=body_doc,
             post_title=post.title,
             seo_title=post.seo_title,
             meta_description=post.seo_description,
@@ -247,18 +289,52 @@ def run_topic_pipeline(topic: TopicProfile) -> bool:
                 headline_score,
                 config.HEADLINE_MIN_SCORE,
             )
-            state.mark_processed(
-                article.url,
-                title=post.title,
-                score=score,
-                status="seo_failed",
-                topic_id=topic.topic_id,
-            )
-            return False
+            graph.cancel("SEO gate no pasó")
+        return truseo_score, headline_score
 
-    # 4. Generate cover image
-    logger.info("=== Paso 4: Generación de imagen de portada ===")
-    image_path = generate_cover_image(post.image_prompt, brand_id=topic.brand_kit)
+    def stage_upload(image_path: Path | None, _scores: tuple) -> int | None:
+        if not image_path:
+            return None
+        media_id = upload_media(
+            image_path,
+            title=post.title,
+            alt_text=post.image_alt_text,
+            caption=post.excerpt or post.title,
+            description=post.seo_description or post.excerpt,
+        )
+        if media_id is None:
+            logger.warning("No se pudo subir la imagen, continuando sin imagen destacada")
+        return media_id
+
+    graph.add("image", stage_image)
+    graph.add("recent_posts", stage_recent_posts)
+    graph.add("links", stage_links, deps=("recent_posts",))
+    graph.add("seo", stage_seo, deps=("links",))
+    if not config.DRY_RUN:
+        # Lookups overlap with SEO; creating missing terms waits for the gate.
+        graph.add("refs_lookup", lambda: prefetch_draft_refs(post, topic.author_name))
+        graph.add(
+            "refs",
+            lambda _lookup, _scores: resolve_draft_refs(post, topic.author_name),
+            deps=("refs_lookup", "seo"),
+        )
+        graph.add("upload", stage_upload, deps=("image", "seo"))
+    results = graph.run()
+    image_path = results.get("image")
+
+    if graph.cancelled:
+        # Whatever already ran is discarded: the cover never reaches WordPress.
+        if image_path:
+            Path(image_path).unlink(missing_ok=True)
+        state.mark_processed(
+            article.url,
+            title=post.title,
+            score=score,
+            status="seo_failed",
+            topic_id=topic.topic_id,
+        )
+        return False
+    truseo_score, headline_score = results["seo"]
 
     # 5. Publish to WordPress
     if config.DRY_RUN:
@@ -277,19 +353,12 @@ def run_topic_pipeline(topic: TopicProfile) -> bool:
         return True
 
     logger.info("=== Paso 5: Publicación en WordPress (borrador) ===")
-    media_id = None
-    if image_path:
-        media_id = upload_media(
-            image_path,
-            title=post.title,
-            alt_text=post.image_alt_text,
-            caption=post.excerpt or post.title,
-            description=post.seo_description or post.excerpt,
-        )
-        if media_id is None:
-            logger.warning("No se pudo subir la imagen, continuando sin imagen destacada")
-
-    post_id = create_draft(post, media_id=media_id, author_name=topic.author_name)
+    post_id = create_draft(
+        post,
+        media_id=results["upload"],
+        author_name=topic.author_name,
+        refs=results["refs"],
+    )
     if post_id is None:
         logger.error("No se pudo crear el borrador en WordPress.")
         state.mark_processed(
@@ -325,6 +394,9 @@ def run_pipeline() -> bool:
     topics = load_topics(config.TOPICS_FILE, only_ids=config.TOPIC_IDS)
     topics = _rotate_topics(topics)
     logger.info("Topics cargados: %s", [t.topic_id for t in topics])
+    plan = SearchPlan({t.topic_id: t.queries for t in topics})
+    if config.TOPICS_CONCURRENCY > 1 and len(topics) > 1:
+        return _run_topics_concurrently(topics, plan) > 0
     created = 0
 
     for topic in topics:
@@ -334,12 +406,45 @@ def run_pipeline() -> bool:
                 config.TOPICS_MAX_POSTS_PER_RUN,
             )
             break
-        if run_topic_pipeline(topic):
+        if run_topic_pipeline(topic, plan):
             created += 1
 
     return created > 0
 
 
+def _run_topics_concurrently(topics: list[TopicProfile], plan: SearchPlan) -> int:
+    """Discover topics in parallel, then publish in rotation order up to the cap.
+
+    Only as many discoveries run ahead as the remaining publish budget can
+    use (and TOPICS_CONCURRENCY allows): a topic that yields nothing frees
+    its slot for the next one in rotation, so no paid search/scoring is
+    spent on topics that could never publish. Publishing overlaps with the
+    discoveries queued behind it.
+    """
+    created = 0
+    workers = min(len(topics), config.TOPICS_CONCURRENCY)
+    logger.info("Modo concurrente: descubrimiento de hasta %d topics a la vez", workers)
+    queue = list(topics)
+    in_flight: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic") as pool:
+        while True:
+            budget = config.TOPICS_MAX_POSTS_PER_RUN - created
+            while queue and len(in_flight) < min(workers, budget):
+                topic = queue.pop(0)
+                in_flight.append((topic, pool.submit(discover_topic, topic, plan)))
+            if not in_flight:
+                break
+            topic, future = in_flight.popleft()
+            if publish_topic(topic, future.result()):
+                created += 1
+    if created >= config.TOPICS_MAX_POSTS_PER_RUN:
+        logger.info(
+            "Límite de publicaciones por corrida alcanzado (%d)",
+            config.TOPICS_MAX_POSTS_PER_RUN,
+        )
+    return created
+
+
 def main() -> None:
     config.setup_logging()
     config.validate()
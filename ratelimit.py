@@ -0,0 +1,56 @@
+"""Limitadores de tasa compartidos entre hilos (token bucket)."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket. ``rate <= 0`` disables limiting."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(self.rate, 1.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_SERVICE_LIMITERS: dict[str, TokenBucket] = {}
+_SERVICE_LOCK = threading.Lock()
+
+
+def service_limiter(name: str, rate: float) -> TokenBucket:
+    """Process-wide bucket for one external service (e.g. ``"gemini_text"``).
+
+    Every thread calling the same service shares one bucket; ``rate`` is in
+    requests per second and only the first call for a name sets it.
+    """
+    with _SERVICE_LOCK:
+        limiter = _SERVICE_LIMITERS.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate)
+            _SERVICE_LIMITERS[name] = limiter
+        return limiter
@@ -4,7 +4,15 @@ Diplomado AMMAC, firmada por el autor de su materia, sin mencionar el cuadernill
 Independiente del pipeline de noticias:
 - ignora MAX_DRAFT_BACKLOG (tiene su propio tope por corrida, CUADERNILLOS_MAX_PER_RUN)
 - usa status "cuadernillo_draft" para NO afectar la cadencia/rotación de noticias
-- es reanudable: el state evita repetir cuadernillos ya generados
+- es reanudable: el state evita repetir cuadernillos ya generados y marca con un
+  checkpoint (cuad_in_progress) los que están en curso, que se retoman si la
+  corrida se interrumpe; justo antes de crear el borrador pasa a cuad_publishing
+  (con el wp_post_id en cuanto existe), y al retomar se reutiliza ese borrador
+  en lugar de duplicarlo
+- con CUADERNILLOS_CONCURRENCY > 1 procesa varias materias en paralelo (dentro de
+  una materia se respeta el orden de sesiones); el ritmo contra Gemini y WordPress
+  lo marcan los limitadores por servicio (GEMINI_TEXT_RPM, GEMINI_IMAGE_RPM,
+  WP_REQUESTS_PER_SECOND)
 
 Uso:
   python run_cuadernillos.py --limit 1 --dry-run      # prueba, no publica ni marca
@@ -19,18 +27,25 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import config
 import cuadernillo_source as cs
 import state
 from content import generate_post
 from image_gen import generate_cover_image
+from html_doc import HtmlDocument
 from link_optimizer import sanitize_and_enrich_body
 from notifier import notify_draft_created
 from search import SearchResult
 from seo_rules import analyze_headline, analyze_truseo, build_slug
-from wordpress import create_draft, list_recent_published_posts, upload_media
+from wordpress import (
+    create_draft,
+    find_draft_by_title,
+    list_recent_published_posts,
+    upload_media,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,12 +54,42 @@ STATUS_DRAFT = "cuadernillo_draft"
 STATUS_FAILED = "cuad_gen_failed"
 
 
+def _resume_draft(item: cs.Cuadernillo) -> tuple[int, str] | None:
+    """(post_id, title) of a draft an interrupted run already created for ``item``."""
+    row = state.get_processed(item.pseudo_url, topic_id=item.topic_id)
+    if not row or row["status"] != cs.STATUS_PUBLISHING:
+        return None
+    post_id = row["wp_post_id"]
+    if not post_id:
+        # Interrupted between the POST and its response: look the draft up by title.
+        post_id = find_draft_by_title(row["title"])
+    return (int(post_id), row["title"]) if post_id else None
+
+
 def _process_one(item: cs.Cuadernillo, dry_run: bool) -> bool:
     logger.info(
         "=== Cuadernillo %s/s%d :: %s (autor: %s) ===",
         item.materia_id, item.session_n, item.topic_label, item.author_name,
     )
 
+    if not dry_run:
+        resumed = _resume_draft(item)
+        if resumed:
+            existing_id, title = resumed
+            state.mark_processed(
+                item.pseudo_url, title=title, wp_post_id=existing_id,
+                status=STATUS_DRAFT, topic_id=item.topic_id,
+            )
+            logger.info(
+                "=== Cuadernillo ya tenía borrador #%d de una corrida interrumpida; no se duplica ===",
+                existing_id,
+            )
+            return True
+        state.mark_processed(
+            item.pseudo_url, title=item.topic_label,
+            status=cs.STATUS_IN_PROGRESS, topic_id=item.topic_id,
+        )
+
     article = SearchResult(
         title=item.topic_label,
         url=item.pseudo_url,
@@ -81,15 +126,16 @@ def _process_one(item: cs.Cuadernillo, dry_run: bool) -> bool:
     gallery_n = getattr(config, "RECENT_POSTS_GALLERY_COUNT", 0)
     if gallery_n and not dry_run:
         recent_posts = list_recent_published_posts(limit=gallery_n)
+    body_doc = HtmlDocument(post.body)
     post.body, _ = sanitize_and_enrich_body(
-        html=post.body, source_url="", recent_posts=recent_posts,
+        html=body_doc, source_url="", recent_posts=recent_posts,
     )
 
     # SEO local: se calcula y registra (NO se usa como filtro: queremos cubrir todo).
     truseo_score = headline_score = None
     if config.LOCAL_SEO_RULES_ENABLED:
         truseo = analyze_truseo(
-            html=post.body, post_title=post.title, seo_title=post.seo_title,
+            html=body_doc, post_title=post.title, seo_title=post.seo_title,
             meta_description=post.seo_description,
             slug=build_slug(post.seo_title or post.title),
             focus_keyphrase=post.focus_keyphrase, site_domain=config.WP_SITE_DOMAIN,
@@ -126,7 +172,17 @@ def _process_one(item: cs.Cuadernillo, dry_run: bool) -> bool:
             description=post.seo_description or post.excerpt,
         )
 
-    post_id = create_draft(post, media_id=media_id, author_name=item.author_name)
+    state.mark_processed(
+        item.pseudo_url, title=post.title,
+        status=cs.STATUS_PUBLISHING, topic_id=item.topic_id,
+    )
+    post_id = create_draft(
+        post, media_id=media_id, author_name=item.author_name,
+        on_created=lambda new_id: state.mark_processed(
+            item.pseudo_url, title=post.title, wp_post_id=new_id,
+            status=cs.STATUS_PUBLISHING, topic_id=item.topic_id,
+        ),
+    )
     if post_id is None:
         logger.error("No se pudo crear el borrador para %s.", item.pseudo_url)
         state.mark_processed(
@@ -166,15 +222,36 @@ def run(limit: int, materia: str = "", author_only: str = "", dry_run: bool = Fa
         total_pending, len(pending), dry_run,
     )
 
+    # Una cola por materia: las sesiones de una materia salen en orden, y las
+    # materias avanzan en paralelo hasta CUADERNILLOS_CONCURRENCY a la vez.
+    groups: dict[str, list[cs.Cuadernillo]] = {}
+    for item in pending:
+        groups.setdefault(item.materia_id, []).append(item)
+
     created = 0
-    for i, item in enumerate(pending):
-        try:
-            if _process_one(item, dry_run=dry_run):
-                created += 1
-        except Exception:
-            logger.exception("Error procesando %s", item.pseudo_url)
-        if i < len(pending) - 1 and config.CUADERNILLOS_THROTTLE_SECONDS > 0:
-            time.sleep(config.CUADERNILLOS_THROTTLE_SECONDS)
+    finished = 0
+    progress_lock = threading.Lock()
+
+    def run_group(items: list[cs.Cuadernillo]) -> None:
+        nonlocal created, finished
+        for item in items:
+            ok = False
+            try:
+                ok = _process_one(item, dry_run=dry_run)
+            except Exception:
+                logger.exception("Error procesando %s", item.pseudo_url)
+            with progress_lock:
+                finished += 1
+                created += int(ok)
+                logger.info(
+                    "Progreso cuadernillos: %d/%d (generados: %d)",
+                    finished, len(pending), created,
+                )
+
+    workers = max(1, min(len(groups), config.CUADERNILLOS_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cuad") as pool:
+        for future in [pool.submit(run_group, items) for items in groups.values()]:
+            future.result()
 
     logger.info("Listo. Cuadernillos generados en esta corrida: %d/%d", created, len(pending))
     return created
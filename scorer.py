@@ -1,14 +1,18 @@
 """Evalúa relevancia de artículos con enfoque en contenido noticioso/actual."""
 
+import hashlib
 import json
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from urllib.parse import urlparse
 
 from google import genai
 
 import config
+import state
 from search import SearchResult
 
 logger = logging.getLogger(__name__)
@@ -37,6 +41,37 @@ Fragmento: {snippet}
 
 Responde SOLO con el JSON, sin markdown ni texto adicional."""
 
+BATCH_SCORING_PROMPT = """Eres un evaluador experto en educación.
+
+Tema editorial objetivo: {topic_name}
+Lineamientos de evaluación para este tema: {topic_scoring_guidelines}
+
+Evalúa CADA uno de los siguientes artículos/noticias de forma independiente.
+Devuelve un JSON con el campo "scores": un arreglo con un objeto por artículo y
+exactamente estos campos:
+- id: string, el identificador del artículo tal como aparece abajo
+- relevancia: float 0-1 (relevancia para la comunidad Montessori mexicana)
+- valor_educativo: float 0-1 (valor educativo del contenido)
+- actualidad: float 0-1 (qué tan actual y novedoso es; penaliza contenido evergreen)
+- tipo_contenido: string en {{noticia, reportaje, guia, opinion, landing, directorio, homepage, wikipedia}}
+- justificacion: string breve explicando tu evaluación
+
+Reglas clave:
+- Da prioridad a contenido reciente, con hechos concretos, fechas o eventos.
+- Penaliza homepages, páginas "about", FAQs, directorios y contenido enciclopédico evergreen.
+- Si parece contenido institucional genérico (sin novedad), actualidad debe ser baja.
+
+Artículos:
+{articles}
+
+Responde SOLO con el JSON, sin markdown ni texto adicional."""
+
+BATCH_ARTICLE_BLOCK = """[id: {article_id}]
+Título: {title}
+URL: {url}
+Fragmento: {snippet}
+"""
+
 WEIGHTS = {"relevancia": 0.35, "valor_educativo": 0.25, "actualidad": 0.40}
 SCORING_SCHEMA = {
     "type": "object",
@@ -52,6 +87,27 @@ SCORING_SCHEMA = {
     },
 }
 
+BATCH_SCORING_SCHEMA = {
+    "type": "object",
+    "required": ["scores"],
+    "properties": {
+        "scores": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", *SCORING_SCHEMA["required"]],
+                "properties": {
+                    "id": {"type": "string"},
+                    **SCORING_SCHEMA["properties"],
+                },
+            },
+        },
+    },
+}
+
+_CLIENT: genai.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+
 NEWS_HINTS = (
     "news", "noticia", "noticias", "announcement", "press", "release",
     "congreso", "summit", "evento", "conference", "estudio", "investigación",
@@ -107,20 +163,108 @@ def _evergreen_penalty(article: SearchResult, tipo: str) -> float:
     return _clamp(penalty, 0.0, 0.65)
 
 
-def score_article(
+def _max_attainable_score(article: SearchResult) -> float:
+    """Upper bound of the final score: a perfect LLM payload with no content-type penalty."""
+    return _clamp(1.0 + _year_freshness_bonus(article) - _evergreen_penalty(article, ""))
+
+
+def _local_prescore(article: SearchResult) -> float:
+    """Deterministic ranking from URL, year mentions, hints and snippet length."""
+    path = urlparse(article.url).path or ""
+    depth = len([part for part in path.split("/") if part])
+    score = 0.5 + _year_freshness_bonus(article) - _evergreen_penalty(article, "")
+    if re.search(r"/20\d{2}/|20\d{2}[-/]\d{2}", path):
+        score += 0.10
+    if depth >= 2:
+        score += 0.05
+    score += min(len(article.snippet or ""), 300) / 300 * 0.10
+    return score
+
+
+def prefilter_candidates(
+    articles: list[SearchResult],
+    top_k: int,
+    min_score: float,
+) -> list[SearchResult]:
+    """Drop candidates that cannot reach ``min_score`` and keep the top-K by local score.
+
+    ``top_k <= 0`` keeps every reachable candidate. Survivors are returned best-first.
+    """
+    reachable = [a for a in articles if _max_attainable_score(a) >= min_score]
+    ranked = sorted(reachable, key=_local_prescore, reverse=True)
+    if top_k > 0:
+        ranked = ranked[:top_k]
+    return ranked
+
+
+def _get_client() -> genai.Client:
+    """Return a process-wide Gemini client reused by every scoring call."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = genai.Client(api_key=config.GEMINI_API_KEY)
+        return _CLIENT
+
+
+def _parse_json_text(text: str) -> dict:
+    text = (text or "").strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        # Defensive fallback in case model ignores strict output.
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+            if text.endswith("```"):
+                text = text[:-3]
+            text = text.strip()
+        return json.loads(text)
+
+
+def _score_from_payload(article: SearchResult, data: dict) -> float:
+    """Combine the LLM payload with local freshness/evergreen heuristics."""
+    weighted = sum(
+        float(data.get(key, 0.0) or 0.0) * weight for key, weight in WEIGHTS.items()
+    )
+    tipo = str(data.get("tipo_contenido", "")).strip().lower()
+    freshness_bonus = _year_freshness_bonus(article)
+    evergreen_penalty = _evergreen_penalty(article, tipo)
+    final_score = _clamp(weighted + freshness_bonus - evergreen_penalty)
+
+    logger.info(
+        "Score %.2f (base=%.2f, bonus=%.2f, penalty=%.2f, tipo=%s) para '%s' "
+        "(rel=%.1f, edu=%.1f, act=%.1f): %s",
+        final_score, weighted, freshness_bonus, evergreen_penalty, tipo or "n/a",
+        article.title,
+        data.get("relevancia", 0), data.get("valor_educativo", 0),
+        data.get("actualidad", 0), data.get("justificacion", ""),
+    )
+    return final_score
+
+
+def _is_valid_payload(data: object) -> bool:
+    if not isinstance(data, dict):
+        return False
+    try:
+        for key in WEIGHTS:
+            float(data.get(key, 0.0) or 0.0)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _request_payload(
     article: SearchResult,
-    topic_name: str = "Montessori",
-    topic_scoring_guidelines: str = "",
-) -> float | None:
-    """Score a single article. Returns weighted score or None on failure."""
+    topic_name: str,
+    topic_scoring_guidelines: str,
+) -> dict | None:
+    """Ask Gemini for the raw scoring payload of a single article."""
     prompt = SCORING_PROMPT.format(
         topic_name=topic_name,
         topic_scoring_guidelines=topic_scoring_guidelines or "Sin lineamientos adicionales.",
         title=article.title, url=article.url, snippet=article.snippet,
     )
     try:
-        client = genai.Client(api_key=config.GEMINI_API_KEY)
-        response = client.models.generate_content(
+        response = _get_client().models.generate_content(
             model=config.GEMINI_SCORER_MODEL,
             contents=prompt,
             config=genai.types.GenerateContentConfig(
@@ -128,67 +272,268 @@ def score_article(
                 response_schema=SCORING_SCHEMA,
             ),
         )
-        text = (response.text or "").strip()
-        try:
-            data = json.loads(text)
-        except Exception:
-            # Defensive fallback in case model ignores strict output.
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-                if text.endswith("```"):
-                    text = text[:-3]
-                text = text.strip()
-            data = json.loads(text)
-        weighted = sum(
-            data.get(key, 0.0) * weight for key, weight in WEIGHTS.items()
+        data = _parse_json_text(response.text or "")
+    except Exception as exc:
+        logger.warning("Error scoring '%s': %s", article.title, exc)
+        return None
+    if not _is_valid_payload(data):
+        logger.warning("Payload de scoring inválido para '%s'", article.title)
+        return None
+    return data
+
+
+def _request_batch_payloads(
+    articles: list[SearchResult],
+    topic_name: str,
+    topic_scoring_guidelines: str,
+) -> list[dict | None]:
+    """Raw payloads for several articles in one request; missing ones retried alone."""
+    if not articles:
+        return []
+    if len(articles) == 1:
+        return [_request_payload(articles[0], topic_name, topic_scoring_guidelines)]
+
+    blocks = "\n".join(
+        BATCH_ARTICLE_BLOCK.format(
+            article_id=f"a{idx}", title=article.title, url=article.url, snippet=article.snippet,
         )
-        tipo = str(data.get("tipo_contenido", "")).strip().lower()
-        freshness_bonus = _year_freshness_bonus(article)
-        evergreen_penalty = _evergreen_penalty(article, tipo)
-        final_score = _clamp(weighted + freshness_bonus - evergreen_penalty)
+        for idx, article in enumerate(articles)
+    )
+    prompt = BATCH_SCORING_PROMPT.format(
+        topic_name=topic_name,
+        topic_scoring_guidelines=topic_scoring_guidelines or "Sin lineamientos adicionales.",
+        articles=blocks,
+    )
+    payloads: dict[int, dict] = {}
+    try:
+        response = _get_client().models.generate_content(
+            model=config.GEMINI_SCORER_MODEL,
+            contents=prompt,
+            config=genai.types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=BATCH_SCORING_SCHEMA,
+            ),
+        )
+        data = _parse_json_text(response.text or "")
+        for entry in data.get("scores", []) if isinstance(data, dict) else []:
+            if not _is_valid_payload(entry):
+                continue
+            match = re.fullmatch(r"a(\d+)", str(entry.get("id", "")).strip())
+            if match and int(match.group(1)) < len(articles):
+                payloads.setdefault(int(match.group(1)), entry)
+    except Exception as exc:
+        logger.warning("Error en scoring por lote (%d artículos): %s", len(articles), exc)
 
+    results: list[dict | None] = []
+    missing = 0
+    for idx, article in enumerate(articles):
+        if idx in payloads:
+            results.append(payloads[idx])
+            continue
+        missing += 1
+        results.append(_request_payload(article, topic_name, topic_scoring_guidelines))
+    if missing:
         logger.info(
-            "Score %.2f (base=%.2f, bonus=%.2f, penalty=%.2f, tipo=%s) para '%s' "
-            "(rel=%.1f, edu=%.1f, act=%.1f): %s",
-            final_score, weighted, freshness_bonus, evergreen_penalty, tipo or "n/a",
-            article.title,
-            data.get("relevancia", 0), data.get("valor_educativo", 0),
-            data.get("actualidad", 0), data.get("justificacion", ""),
+            "Scoring por lote: %d/%d artículos reintentados individualmente",
+            missing, len(articles),
         )
-        return final_score
-    except Exception as exc:
-        logger.warning("Error scoring '%s': %s", article.title, exc)
-        return None
+    return results
 
 
-def select_best(
+def score_article(
+    article: SearchResult,
+    topic_name: str = "Montessori",
+    topic_scoring_guidelines: str = "",
+) -> float | None:
+    """Score a single article. Returns weighted score or None on failure."""
+    data = _request_payload(article, topic_name, topic_scoring_guidelines)
+    return _score_from_payload(article, data) if data is not None else None
+
+
+def score_articles_batch(
+    articles: list[SearchResult],
+    topic_name: str = "Montessori",
+    topic_scoring_guidelines: str = "",
+) -> list[float | None]:
+    """Score several articles in one request; retry missing ones individually.
+
+    Returns one score (or None on failure) per input article, in input order.
+    """
+    payloads = _request_batch_payloads(articles, topic_name, topic_scoring_guidelines)
+    return [
+        _score_from_payload(article, data) if data is not None else None
+        for article, data in zip(articles, payloads)
+    ]
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _score_cache_key(article: SearchResult, topic_name: str, topic_scoring_guidelines: str) -> str:
+    parts = [
+        article.url,
+        _sha256(article.snippet),
+        topic_name,
+        _sha256(topic_scoring_guidelines),
+        config.GEMINI_SCORER_MODEL,
+    ]
+    return _sha256(json.dumps(parts, ensure_ascii=False))
+
+
+def rank_candidates(
     articles: list[SearchResult],
     min_score: float | None = None,
     topic_name: str = "Montessori",
     topic_scoring_guidelines: str = "",
-) -> tuple[SearchResult, float] | None:
-    """Score all articles and return the best one above threshold."""
+    prefilter_top_k: int | None = None,
+) -> list[tuple[SearchResult, float]]:
+    """Score articles concurrently; return those above threshold, best first.
+
+    With SCORER_GOOD_ENOUGH_SCORE set, outstanding scoring requests are
+    cancelled as soon as a candidate clears max(good_enough, min_score), so
+    the list may hold only the candidates scored up to that point.
+    Candidates first go through the local pre-filter, so only the top-K
+    reachable ones (``prefilter_top_k``) cost an LLM call.
+    """
     min_score = min_score if min_score is not None else config.MIN_USABILITY_SCORE
     best: tuple[SearchResult, float] | None = None
-    for article in articles:
-        score = score_article(
-            article,
-            topic_name=topic_name,
-            topic_scoring_guidelines=topic_scoring_guidelines,
-        )
+    ranked: list[tuple[SearchResult, float]] = []
+    top_k = config.SCORER_PREFILTER_TOP_K if prefilter_top_k is None else prefilter_top_k
+    total_candidates = len(articles)
+    articles = prefilter_candidates(articles, top_k=top_k, min_score=min_score)
+    logger.info(
+        "Pre-filtro local [%s]: %d -> %d candidatos (%d descartados sin llamar a Gemini)",
+        topic_name, total_candidates, len(articles), total_candidates - len(articles),
+    )
+
+    # Batches finish in any order: ties are broken by input position so the
+    # best pick and the returned ranking are the same on every run.
+    position = {id(article): idx for idx, article in enumerate(articles)}
+
+    def rank_key(item: tuple[SearchResult, float]) -> tuple[float, int]:
+        return (-item[1], position[id(item[0])])
+
+    def consider(article: SearchResult, score: float | None) -> None:
+        nonlocal best
         if score is None:
-            continue
+            return
         if score < min_score:
             logger.info("Descartado (score %.2f < %.2f): %s",
                         score, min_score, article.title)
-            continue
-        if best is None or score > best[1]:
+            return
+        ranked.append((article, score))
+        if best is None or rank_key((article, score)) < rank_key(best):
             best = (article, score)
 
-    if best:
-        logger.info("Mejor artículo (score %.2f): %s", best[1], best[0].title)
-    else:
+    # Cached LLM payloads are rescored locally so freshness/evergreen rules stay current.
+    cache_ttl = config.SCORE_CACHE_TTL_HOURS * 3600
+    cache_keys = {
+        id(article): _score_cache_key(article, topic_name, topic_scoring_guidelines)
+        for article in articles
+    }
+    cached: dict[str, dict] = {}
+    if config.SCORE_CACHE_ENABLED and articles:
+        try:
+            cached = state.get_score_cache(list(cache_keys.values()), max_age_seconds=cache_ttl)
+        except Exception as exc:
+            logger.warning("No se pudo leer cache de scoring: %s", exc)
+    pending: list[SearchResult] = []
+    for article in articles:
+        data = cached.get(cache_keys[id(article)])
+        if data is not None and _is_valid_payload(data):
+            consider(article, _score_from_payload(article, data))
+        else:
+            pending.append(article)
+    if config.SCORE_CACHE_ENABLED:
+        logger.info(
+            "Cache de scoring [%s]: hits=%d, a evaluar=%d",
+            topic_name, len(articles) - len(pending), len(pending),
+        )
+
+    batch_size = max(1, config.SCORER_BATCH_SIZE)
+    chunks = [
+        pending[start:start + batch_size]
+        for start in range(0, len(pending), batch_size)
+    ]
+    good_enough = config.SCORER_GOOD_ENOUGH_SCORE
+    exit_threshold = max(good_enough, min_score) if good_enough > 0 else None
+
+    def good_enough_found() -> bool:
+        return exit_threshold is not None and best is not None and best[1] >= exit_threshold
+
+    if good_enough_found():
+        logger.info(
+            "Early exit [%s]: candidato en cache con score %.2f; %d llamadas de scoring ahorradas",
+            topic_name, best[1], len(chunks),
+        )
+        chunks = []
+
+    def absorb(chunk: list[SearchResult], payloads: list) -> None:
+        for article, data in zip(chunk, payloads):
+            if data is None:
+                continue
+            if config.SCORE_CACHE_ENABLED:
+                try:
+                    state.save_score_cache(
+                        cache_key=cache_keys[id(article)],
+                        url=article.url,
+                        topic_name=topic_name,
+                        model=config.GEMINI_SCORER_MODEL,
+                        payload=data,
+                    )
+                except Exception as exc:
+                    logger.warning("No se pudo guardar cache de scoring: %s", exc)
+            consider(article, _score_from_payload(article, data))
+
+    workers = max(1, min(len(chunks), config.SCORER_MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scorer") as pool:
+        futures = {
+            pool.submit(_request_batch_payloads, chunk, topic_name, topic_scoring_guidelines): chunk
+            for chunk in chunks
+        }
+        absorbed: set = set()
+        for future in as_completed(futures):
+            absorb(futures[future], future.result())
+            absorbed.add(future)
+            if good_enough_found():
+                saved_calls = sum(1 for other in futures if other.cancel())
+                # Calls already running (or finished) are paid for: keep and cache them.
+                kept = [other for other in futures if other not in absorbed and not other.cancelled()]
+                logger.info(
+                    "Early exit [%s]: score %.2f >= %.2f; %d llamadas de scoring ahorradas "
+                    "(canceladas), %d en curso conservadas",
+                    topic_name, best[1], exit_threshold, saved_calls, len(kept),
+                )
+                for other in kept:
+                    absorb(futures[other], other.result())
+                break
+
+    ranked.sort(key=rank_key)
+    if not ranked:
         logger.warning("Ningún artículo superó el umbral de %.2f", min_score)
+    return ranked
+
+
+def select_best(
+    articles: list[SearchResult],
+    min_score: float | None = None,
+    topic_name: str = "Montessori",
+    topic_scoring_guidelines: str = "",
+    prefilter_top_k: int | None = None,
+) -> tuple[SearchResult, float] | None:
+    """Score articles concurrently and return the best one above threshold."""
+    ranked = rank_candidates(
+        articles,
+        min_score=min_score,
+        topic_name=topic_name,
+        topic_scoring_guidelines=topic_scoring_guidelines,
+        prefilter_top_k=prefilter_top_k,
+    )
+    if not ranked:
+        return None
+    best = ranked[0]
+    logger.info("Mejor artículo (score %.2f): %s", best[1], best[0].title)
     return best
 
 
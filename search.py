@@ -1,9 +1,15 @@
 """Módulo de búsqueda de noticias (Brave Search por defecto)."""
 
+import atexit
+import functools
+import hashlib
+import json
 import logging
 import re
+import threading
 import time
 import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from urllib.parse import urlparse
 
@@ -11,6 +17,8 @@ import httpx
 
 import config
 import state
+from ratelimit import TokenBucket
+from term_matcher import TermMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +26,10 @@ BRAVE_ENDPOINT = "https://api.search.brave.com/res/v1/web/search"
 CSE_ENDPOINT = "https://www.googleapis.com/customsearch/v1"
 SEARCH_TERMINAL_STATUSES = ("processed", "published_draft", "dry_run", "wp_failed")
 
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+_RATE_LIMITERS: dict[str, TokenBucket] = {}
+
 
 @dataclass
 class SearchResult:
@@ -34,6 +46,40 @@ def _date_restrict() -> str:
     return "d7"
 
 
+def _get_client() -> httpx.Client:
+    """Return the shared keep-alive client used by all search providers."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(
+                timeout=30,
+                limits=httpx.Limits(
+                    max_connections=config.SEARCH_MAX_CONCURRENCY,
+                    max_keepalive_connections=config.SEARCH_MAX_CONCURRENCY,
+                ),
+            )
+            atexit.register(close_client)
+        return _CLIENT
+
+
+def close_client() -> None:
+    """Close the shared search client (safe to call more than once)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
+def _rate_limiter(provider: str) -> TokenBucket:
+    with _CLIENT_LOCK:
+        limiter = _RATE_LIMITERS.get(provider)
+        if limiter is None:
+            limiter = TokenBucket(config.SEARCH_RATE_PER_SECOND)
+            _RATE_LIMITERS[provider] = limiter
+        return limiter
+
+
 def _search_brave(query: str, retries: int = 3) -> list[dict]:
     """Execute a Brave Search query with exponential backoff."""
     params = {
@@ -50,14 +96,16 @@ def _search_brave(query: str, retries: int = 3) -> list[dict]:
         "Accept": "application/json",
         "X-Subscription-Token": config.BRAVE_SEARCH_API_KEY,
     }
+    client = _get_client()
+    limiter = _rate_limiter("brave")
     for attempt in range(retries):
         try:
-            with httpx.Client(timeout=30) as client:
-                resp = client.get(BRAVE_ENDPOINT, params=params, headers=headers)
-                resp.raise_for_status()
-                payload = resp.json()
-                web = payload.get("web", {})
-                return web.get("results", []) if isinstance(web, dict) else []
+            limiter.acquire()
+            resp = client.get(BRAVE_ENDPOINT, params=params, headers=headers)
+            resp.raise_for_status()
+            payload = resp.json()
+            web = payload.get("web", {})
+            return web.get("results", []) if isinstance(web, dict) else []
         except (httpx.HTTPStatusError, httpx.RequestError) as exc:
             wait = 2 ** (attempt + 1)
             logger.warning(
@@ -80,12 +128,14 @@ def _search_google_cse(query: str, retries: int = 3) -> list[dict]:
         "dateRestrict": _date_restrict(),
         "num": 10,
     }
+    client = _get_client()
+    limiter = _rate_limiter("google_cse")
     for attempt in range(retries):
         try:
-            with httpx.Client(timeout=30) as client:
-                resp = client.get(CSE_ENDPOINT, params=params)
-                resp.raise_for_status()
-                return resp.json().get("items", [])
+            limiter.acquire()
+            resp = client.get(CSE_ENDPOINT, params=params)
+            resp.raise_for_status()
+            return resp.json().get("items", [])
         except (httpx.HTTPStatusError, httpx.RequestError) as exc:
             wait = 2 ** (attempt + 1)
             logger.warning(
@@ -99,6 +149,7 @@ def _search_google_cse(query: str, retries: int = 3) -> list[dict]:
 
 def _search_query(query: str, retries: int = 3) -> list[dict]:
     """Execute one query using configured provider."""
+    logger.info("Buscando (%s): '%s'", config.SEARCH_PROVIDER, query)
     if config.SEARCH_PROVIDER == "brave":
         return _search_brave(query, retries=retries)
     if config.SEARCH_PROVIDER == "google_cse":
@@ -107,6 +158,55 @@ def _search_query(query: str, retries: int = 3) -> list[dict]:
     return []
 
 
+def _cache_key(query: str) -> str:
+    """Key raw payloads by every parameter that changes the provider response."""
+    if config.SEARCH_PROVIDER == "google_cse":
+        parts = [config.SEARCH_PROVIDER, query, "mx", "lang_es", _date_restrict(), 10]
+    else:
+        parts = [
+            config.SEARCH_PROVIDER,
+            query,
+            config.BRAVE_SEARCH_COUNTRY,
+            config.BRAVE_SEARCH_LANG,
+            config.BRAVE_SEARCH_FRESHNESS,
+            config.BRAVE_SEARCH_COUNT,
+        ]
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cached_search_query(query: str) -> tuple[list[dict], bool]:
+    """Return (items, cache_hit), consulting the on-disk cache before the network."""
+    if not config.SEARCH_CACHE_ENABLED:
+        return _search_query(query), False
+    ttl_seconds = config.SEARCH_CACHE_TTL_HOURS * 3600
+    key = _cache_key(query)
+    try:
+        cached = state.get_search_cache(key, max_age_seconds=ttl_seconds)
+    except Exception as exc:
+        logger.warning("No se pudo leer cache de búsqueda para '%s': %s", query, exc)
+        cached = None
+    if cached is not None:
+        logger.info("Cache hit (%s): '%s'", config.SEARCH_PROVIDER, query)
+        return cached, True
+
+    items = _search_query(query)
+    # Empty lists are not cached: they usually mean every retry failed.
+    if items:
+        try:
+            state.save_search_cache(
+                cache_key=key,
+                provider=config.SEARCH_PROVIDER,
+                query=query,
+                items=items,
+                max_age_seconds=ttl_seconds,
+                max_bytes=int(config.SEARCH_CACHE_MAX_MB * 1024 * 1024),
+            )
+        except Exception as exc:
+            logger.warning("No se pudo guardar cache de búsqueda para '%s': %s", query, exc)
+    return items, False
+
+
 def _extract_fields(item: dict) -> tuple[str, str, str]:
     """Normalize search item fields across providers."""
     if config.SEARCH_PROVIDER == "google_cse":
@@ -146,40 +246,91 @@ def _normalize_for_match(text: str) -> str:
     return " ".join(text.split())
 
 
+@functools.lru_cache(maxsize=4)
+def _blocked_source_matcher(terms: tuple[str, ...]) -> TermMatcher:
+    return TermMatcher(terms, normalize=_normalize_for_match)
+
+
 def _has_blocked_source_mentions(title: str, url: str, snippet: str) -> bool:
     """Return True when source clearly belongs to blocked organizations."""
-    haystack = _normalize_for_match(f"{title} {url} {snippet}")
-    tokens = set(haystack.split())
-    for term in config.BLOCKED_SOURCE_TERMS:
-        needle = _normalize_for_match(term)
-        if not needle:
-            continue
-        # For very short terms (e.g. "ami"), require full token match.
-        if len(needle) <= 3 and " " not in needle:
-            if needle in tokens:
-                return True
-            continue
-        if needle in haystack:
-            return True
-    return False
+    matcher = _blocked_source_matcher(tuple(config.BLOCKED_SOURCE_TERMS))
+    return matcher.first({"title": title, "url": url, "snippet": snippet}) is not None
 
 
-def search_all(
-    queries: list[str] | None = None,
-    topic_id: str = "default",
-) -> list[SearchResult]:
-    """Run queries, deduplicate, filter already processed for a topic."""
-    queries = queries or config.SEARCH_QUERIES
-    processed_urls = state.get_all_processed_urls(
-        topic_id=topic_id,
-        statuses=SEARCH_TERMINAL_STATUSES,
-    )
-    seen_urls: set[str] = set()
-    results: list[SearchResult] = []
+def _normalize_query(query: str) -> str:
+    """Key under which equivalent queries share one provider request."""
+    return " ".join(unicodedata.normalize("NFC", query).split()).casefold()
+
+
+class SearchPlan:
+    """Run-scoped query registry: each normalized query hits the provider once.
+
+    Topics ask for their queries through ``fetch``; a query already fetched
+    (or being fetched by another thread) for an earlier topic is reused, so
+    overlapping ``topics.yml`` queries cost one request per run. Queries are
+    only fetched when a topic asks for them, so topics never reached because
+    of the per-run cap cost nothing.
+    """
+
+    def __init__(self, queries_by_topic: dict[str, list[str]] | None = None):
+        self._lock = threading.Lock()
+        self._batches: dict[str, Future] = {}
+        if queries_by_topic:
+            total = sum(len(queries) for queries in queries_by_topic.values())
+            unique = {_normalize_query(q) for queries in queries_by_topic.values() for q in queries}
+            logger.info(
+                "Plan de búsqueda: %d consultas en %d topics, %d únicas",
+                total, len(queries_by_topic), len(unique),
+            )
+
+    def fetch(self, queries: list[str], topic_id: str = "default") -> list[list[dict]]:
+        """Return the raw items of each query, in order, fetching only new ones."""
+        owned: list[tuple[str, Future]] = []
+        futures: list[Future] = []
+        with self._lock:
+            for query in queries:
+                key = _normalize_query(query)
+                future = self._batches.get(key)
+                if future is None:
+                    future = Future()
+                    self._batches[key] = future
+                    owned.append((query, future))
+                futures.append(future)
+
+        if owned:
+            # Backoff sleeps happen inside each worker, so one slow query never
+            # blocks the rest.
+            workers = max(1, min(len(owned), config.SEARCH_MAX_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search") as pool:
+                hits = sum(pool.map(lambda job: _fill_batch(*job), owned))
+            if config.SEARCH_CACHE_ENABLED:
+                logger.info(
+                    "Cache de búsqueda [%s]: hits=%d, misses=%d",
+                    topic_id, hits, len(owned) - hits,
+                )
+        shared = len(queries) - len(owned)
+        if shared:
+            logger.info("Consultas compartidas con otros topics [%s]: %d", topic_id, shared)
+        return [future.result() for future in futures]
+
+
+def _fill_batch(query: str, future: Future) -> bool:
+    """Resolve ``future`` with the items for ``query``; return whether it was a cache hit."""
+    try:
+        items, hit = _cached_search_query(query)
+    except BaseException as exc:
+        # Other topics may be waiting on this future: never leave it pending.
+        future.set_exception(exc)
+        raise
+    future.set_result(items)
+    return hit
+
 
-    for query in queries:
-        logger.info("Buscando (%s): '%s'", config.SEARCH_PROVIDER, query)
-        items = _search_query(query)
+def _filter_candidates(batches: list[list[dict]], topic_id: str) -> list[SearchResult]:
+    """Deduplicate in query order and drop excluded, blocked and processed URLs."""
+    seen_urls: set[str] = set()
+    candidates: list[SearchResult] = []
+    for items in batches:
         for item in items:
             title, url, snippet = _extract_fields(item)
             if (
@@ -187,11 +338,10 @@ def search_all(
                 or _is_excluded_url(url)
                 or _has_blocked_source_mentions(title, url, snippet)
                 or url in seen_urls
-                or url in processed_urls
             ):
                 continue
             seen_urls.add(url)
-            results.append(
+            candidates.append(
                 SearchResult(
                     title=title,
                     url=url,
@@ -199,7 +349,26 @@ def search_all(
                 )
             )
 
-    logger.info("Total resultados únicos (nuevos): %d", len(results))
+    processed = state.filter_processed(
+        [(topic_id, c.url) for c in candidates],
+        statuses=SEARCH_TERMINAL_STATUSES,
+    )
+    return [c for c in candidates if (topic_id, c.url) not in processed]
+
+
+def search_all(
+    queries: list[str] | None = None,
+    topic_id: str = "default",
+    plan: SearchPlan | None = None,
+) -> list[SearchResult]:
+    """Run queries concurrently, deduplicate in query order, filter processed URLs.
+
+    Pass the run's ``plan`` to reuse queries already fetched for other topics.
+    """
+    queries = queries or config.SEARCH_QUERIES
+    batches = (plan or SearchPlan()).fetch(queries, topic_id=topic_id)
+    results = _filter_candidates(batches, topic_id)
+    logger.info("Total resultados únicos (nuevos) [%s]: %d", topic_id, len(results))
     return results
 
 
@@ -7,7 +7,7 @@ import unicodedata
 from dataclasses import asdict, dataclass
 from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
+from html_doc import HtmlDocument
 
 
 @dataclass
@@ -66,35 +66,26 @@ def _word_count(text: str) -> int:
     return len(re.findall(r"\b[\wáéíóúüñ]+\b", text.lower(), flags=re.UNICODE))
 
 
-def _extract_text_from_html(html: str) -> str:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    return soup.get_text(separator=" ", strip=True)
+def _extract_text_from_html(html: str | HtmlDocument) -> str:
+    return HtmlDocument.coerce(html).visible_text
 
 
 def _split_sentences(text: str) -> list[str]:
     return [part.strip() for part in re.split(r"[.!?]+", text) if part.strip()]
 
 
-def _first_sentence(html: str) -> str:
-    soup = BeautifulSoup(html or "", "html.parser")
-    first_p = soup.find("p")
-    if first_p is None:
-        return ""
-    text = first_p.get_text(" ", strip=True)
+def _first_sentence(html: str | HtmlDocument) -> str:
+    text = HtmlDocument.coerce(html).first_paragraph
     sentences = _split_sentences(text)
     return sentences[0] if sentences else text
 
 
-def _count_internal_external_links(html: str, site_domain: str) -> tuple[int, int]:
-    soup = BeautifulSoup(html or "", "html.parser")
+def _count_internal_external_links(html: str | HtmlDocument, site_domain: str) -> tuple[int, int]:
     internal = 0
     external = 0
     domain = (site_domain or "").strip().lower()
 
-    for anchor in soup.find_all("a", href=True):
-        href = (anchor.get("href") or "").strip()
+    for href in HtmlDocument.coerce(html).hrefs:
         if not href or href.startswith(("#", "mailto:", "tel:")):
             continue
         if href.startswith("/"):
@@ -112,23 +103,16 @@ def _count_internal_external_links(html: str, site_domain: str) -> tuple[int, in
     return internal, external
 
 
-def _has_media(html: str) -> bool:
-    soup = BeautifulSoup(html or "", "html.parser")
-    return bool(soup.find(["img", "video", "iframe"]))
+def _has_media(html: str | HtmlDocument) -> bool:
+    return HtmlDocument.coerce(html).has_media
 
 
-def _paragraphs_over_120_words(html: str) -> int:
-    soup = BeautifulSoup(html or "", "html.parser")
-    count = 0
-    for paragraph in soup.find_all("p"):
-        if _word_count(paragraph.get_text(" ", strip=True)) > 120:
-            count += 1
-    return count
+def _paragraphs_over_120_words(html: str | HtmlDocument) -> int:
+    return sum(1 for text in HtmlDocument.coerce(html).paragraphs if _word_count(text) > 120)
 
 
-def _has_h2_or_h3(html: str) -> bool:
-    soup = BeautifulSoup(html or "", "html.parser")
-    return bool(soup.find(["h2", "h3"]))
+def _has_h2_or_h3(html: str | HtmlDocument) -> bool:
+    return bool(HtmlDocument.coerce(html).subheadings)
 
 
 def _keyword_occurrences(text: str, phrase: str, strict_phrase: bool = True) -> int:
@@ -142,18 +126,15 @@ def _keyword_occurrences(text: str, phrase: str, strict_phrase: bool = True) ->
     return content.count(keyword)
 
 
-def _keyword_in_subheadings(html: str, phrase: str, strict_phrase: bool = True) -> bool:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for heading in soup.find_all(["h2", "h3"]):
-        if _keyword_occurrences(heading.get_text(" ", strip=True), phrase, strict_phrase) > 0:
+def _keyword_in_subheadings(html: str | HtmlDocument, phrase: str, strict_phrase: bool = True) -> bool:
+    for heading in HtmlDocument.coerce(html).subheadings:
+        if _keyword_occurrences(heading, phrase, strict_phrase) > 0:
             return True
     return False
 
 
-def _keyword_in_img_alt(html: str, phrase: str, strict_phrase: bool = True) -> bool:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for image in soup.find_all("img"):
-        alt_text = image.get("alt") or ""
+def _keyword_in_img_alt(html: str | HtmlDocument, phrase: str, strict_phrase: bool = True) -> bool:
+    for alt_text in HtmlDocument.coerce(html).image_alts:
         if _keyword_occurrences(alt_text, phrase, strict_phrase) > 0:
             return True
     return False
@@ -161,7 +142,7 @@ def _keyword_in_img_alt(html: str, phrase: str, strict_phrase: bool = True) -> b
 
 def analyze_truseo(
     *,
-    html: str,
+    html: str | HtmlDocument,
     post_title: str,
     seo_title: str,
     meta_description: str,
@@ -176,6 +157,7 @@ def analyze_truseo(
     post_title_max_len: int = 60,
     strict_phrase: bool = True,
 ) -> dict[str, ScoreReport]:
+    html = HtmlDocument.coerce(html)
     text = _extract_text_from_html(html)
     word_count = _word_count(text)
     internal_links, external_links = _count_internal_external_links(html, site_domain)
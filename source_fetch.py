@@ -1,13 +1,25 @@
 """Fetch and extract article body metadata from source URLs."""
 
+import atexit
+import codecs
+import hashlib
 import json
 import logging
+import os
 import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
 
 import httpx
 from bs4 import BeautifulSoup
 
 import config
+from html_doc import make_soup, parser_backend
 from search import SearchResult
 
 logger = logging.getLogger(__name__)
@@ -16,42 +28,104 @@ USER_AGENT = (
     "Mozilla/5.0 (compatible; MontessoriBlogAutomation/1.0; +https://montessorimexico.org)"
 )
 
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_client() -> httpx.Client:
+    """Return the shared keep-alive client used for source pages."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = httpx.Client(
+                timeout=25,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(
+                    max_connections=config.SOURCE_PREFETCH_TOP_N,
+                    max_keepalive_connections=config.SOURCE_PREFETCH_TOP_N,
+                ),
+            )
+            atexit.register(close_client)
+        return _CLIENT
+
+
+def close_client() -> None:
+    """Close the shared source client (safe to call more than once)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
 
 def _clean_text(text: str) -> str:
     text = re.sub(r"\s+", " ", (text or "")).strip()
     return text
 
 
+_SKIP_TAGS = ["script", "style", "noscript", "svg", "nav", "footer"]
+
+_META_DATE_KEYS = [
+    ("property", "article:published_time"),
+    ("property", "og:published_time"),
+    ("name", "pubdate"),
+    ("name", "publishdate"),
+    ("name", "date"),
+    ("name", "dc.date"),
+]
+_META_AUTHOR_KEYS = [("name", "author"), ("property", "article:author")]
+
+
 def _extract_text(soup: BeautifulSoup, max_chars: int) -> str:
     # Prefer semantic article/main before body fallback.
     node = soup.find("article") or soup.find("main") or soup.body
     if not node:
         return ""
-    for bad in node.find_all(["script", "style", "noscript", "svg", "nav", "footer"]):
+    for bad in node.find_all(_SKIP_TAGS):
         bad.decompose()
     text = _clean_text(node.get_text(separator=" "))
     return text[:max_chars]
 
 
+def _apply_json_ld(raw: str, published_at: str, author: str) -> tuple[str, str]:
+    """Fill whichever of published_at/author is still empty from one JSON-LD block."""
+    if not raw.strip():
+        return published_at, author
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return published_at, author
+    objects = data if isinstance(data, list) else [data]
+    for obj in objects:
+        if not isinstance(obj, dict):
+            continue
+        if not published_at and obj.get("datePublished"):
+            published_at = _clean_text(str(obj.get("datePublished")))
+        if not author and obj.get("author"):
+            auth = obj["author"]
+            if isinstance(auth, dict):
+                author = _clean_text(str(auth.get("name", "")))
+            elif isinstance(auth, list) and auth and isinstance(auth[0], dict):
+                author = _clean_text(str(auth[0].get("name", "")))
+            else:
+                author = _clean_text(str(auth))
+        if published_at and author:
+            break
+    return published_at, author
+
+
 def _extract_meta(soup: BeautifulSoup) -> tuple[str, str]:
     published_at = ""
     author = ""
 
-    meta_date_keys = [
-        ("property", "article:published_time"),
-        ("property", "og:published_time"),
-        ("name", "pubdate"),
-        ("name", "publishdate"),
-        ("name", "date"),
-        ("name", "dc.date"),
-    ]
-    for attr, key in meta_date_keys:
+    for attr, key in _META_DATE_KEYS:
         tag = soup.find("meta", attrs={attr: key})
         if tag and tag.get("content"):
             published_at = _clean_text(tag["content"])
             break
 
-    for attr, key in [("name", "author"), ("property", "article:author")]:
+    for attr, key in _META_AUTHOR_KEYS:
         tag = soup.find("meta", attrs={attr: key})
         if tag and tag.get("content"):
             author = _clean_text(tag["content"])
@@ -61,72 +135,510 @@ def _extract_meta(soup: BeautifulSoup) -> tuple[str, str]:
     if not published_at or not author:
         for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
             raw = script.string or script.get_text() or ""
-            if not raw.strip():
-                continue
-            try:
-                data = json.loads(raw)
-            except Exception:
-                continue
-            objects = data if isinstance(data, list) else [data]
-            for obj in objects:
-                if not isinstance(obj, dict):
-                    continue
-                if not published_at and obj.get("datePublished"):
-                    published_at = _clean_text(str(obj.get("datePublished")))
-                if not author and obj.get("author"):
-                    auth = obj["author"]
-                    if isinstance(auth, dict):
-                        author = _clean_text(str(auth.get("name", "")))
-                    elif isinstance(auth, list) and auth and isinstance(auth[0], dict):
-                        author = _clean_text(str(auth[0].get("name", "")))
-                    else:
-                        author = _clean_text(str(auth))
-                if published_at and author:
-                    break
+            published_at, author = _apply_json_ld(raw, published_at, author)
             if published_at and author:
                 break
 
     return published_at[:80], author[:120]
 
 
+class _StreamExtractor(HTMLParser):
+    """Incremental counterpart of ``_extract_text`` + ``_extract_meta``.
+
+    Fed chunk by chunk while the response streams in; ``done`` turns true once
+    the first <article> has yielded enough text and both meta fields are known,
+    so the caller can stop downloading.
+    """
+
+    _REGIONS = ("article", "main")
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._texts: dict[str, list[str]] = {"article": [], "main": [], "body": []}
+        self._lengths = dict.fromkeys(self._texts, 0)
+        self._depth = dict.fromkeys(self._REGIONS, 0)
+        self._finished: set[str] = set()
+        self._seen: set[str] = set()
+        self._pending: list[str] = []
+        self._skip_depth = 0
+        self._in_head = False
+        self._json_ld: list[str] | None = None
+        self._meta: dict[tuple[str, str], str] = {}
+        self._ld_published = ""
+        self._ld_author = ""
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attributes = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "meta":
+            content = attributes.get("content", "")
+            for attr in ("property", "name"):
+                key = (attr, attributes.get(attr, "").strip().lower())
+                if content and key not in self._meta:
+                    self._meta[key] = _clean_text(content)
+        elif tag == "head":
+            self._in_head = True
+        elif tag == "body":
+            self._in_head = False
+        if tag == "script" and attributes.get("type", "").strip().lower() == "application/ld+json":
+            self._json_ld = []
+        if tag in _SKIP_TAGS or tag == "title":
+            self._skip_depth += 1
+        if tag in self._texts:
+            self._seen.add(tag)
+        if tag in self._depth and tag not in self._finished:
+            self._depth[tag] += 1
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == "script" and self._json_ld is not None:
+            self._ld_published, self._ld_author = _apply_json_ld(
+                "".join(self._json_ld), self._ld_published, self._ld_author
+            )
+            self._json_ld = None
+        if (tag in _SKIP_TAGS or tag == "title") and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == "head":
+            self._in_head = False
+        if self._depth.get(tag):
+            self._depth[tag] -= 1
+            if not self._depth[tag]:
+                self._finished.add(tag)
+        self._check_done()
+
+    def handle_data(self, data):
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+            return
+        if self._skip_depth or self._in_head:
+            return
+        # feed() boundaries split text nodes mid-word: buffer until the next tag.
+        self._pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def _flush_text(self) -> None:
+        """Store the text node buffered since the last tag in every open region."""
+        if not self._pending:
+            return
+        piece = " ".join("".join(self._pending).split())
+        self._pending = []
+        if not piece:
+            return
+        regions = ["body"] + [name for name in self._REGIONS if self._depth[name]]
+        for region in regions:
+            if self._lengths[region] < self.max_chars:
+                self._texts[region].append(piece)
+                self._lengths[region] += len(piece) + 1
+
+    def _meta_value(self, keys: list[tuple[str, str]]) -> str:
+        for key in keys:
+            if self._meta.get(key):
+                return self._meta[key]
+        return ""
+
+    @property
+    def published_at(self) -> str:
+        return (self._meta_value(_META_DATE_KEYS) or self._ld_published)[:80]
+
+    @property
+    def author(self) -> str:
+        return (self._meta_value(_META_AUTHOR_KEYS) or self._ld_author)[:120]
+
+    def _check_done(self) -> None:
+        article_ready = self._lengths["article"] >= self.max_chars or "article" in self._finished
+        self.done = article_ready and bool(self.published_at) and bool(self.author)
+
+    def text(self) -> str:
+        self._flush_text()
+        # Like _extract_text: the first <article>/<main>/<body> present wins, even if empty.
+        for region in ("article", "main", "body"):
+            if region in self._seen:
+                return _clean_text(" ".join(self._texts[region]))[: self.max_chars]
+        return ""
+
+
+class _SoupExtractor:
+    """Buffer the whole page and extract it with ``make_soup`` (lxml backend).
+
+    Same interface as ``_StreamExtractor`` but never sets ``done``: the C
+    parser is faster per page, at the cost of downloading up to
+    SOURCE_FETCH_MAX_BYTES instead of stopping early.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.done = False
+        self.published_at = ""
+        self.author = ""
+        self._parts: list[str] = []
+        self._text = ""
+
+    def feed(self, data: str) -> None:
+        self._parts.append(data)
+
+    def close(self) -> None:
+        soup = make_soup("".join(self._parts))
+        self._parts = []
+        # Meta first: _extract_text decomposes scripts that may hold JSON-LD.
+        self.published_at, self.author = _extract_meta(soup)
+        self._text = _extract_text(soup, self.max_chars)
+
+    def text(self) -> str:
+        return self._text
+
+
+def _new_extractor() -> _StreamExtractor | _SoupExtractor:
+    """Extractor for the configured HTML_PARSER backend."""
+    if parser_backend() == "lxml":
+        return _SoupExtractor(config.SOURCE_FETCH_MAX_CHARS)
+    return _StreamExtractor(config.SOURCE_FETCH_MAX_CHARS)
+
+
+def _stream_extract(
+    client: httpx.Client,
+    url: str,
+    headers: dict[str, str] | None = None,
+) -> tuple[str, _StreamExtractor | _SoupExtractor | None, dict[str, str]]:
+    """Stream ``url`` into the extractor chosen by ``_new_extractor``.
+
+    Returns ``(status, extractor, validators)`` where status is ``"ok"``,
+    ``"not_modified"`` (304 to a conditional request) or ``"skipped"`` (not
+    HTML, or larger than SOURCE_FETCH_MAX_BYTES); validators holds the
+    response ETag/Last-Modified for later revalidation.
+    """
+    max_bytes = config.SOURCE_FETCH_MAX_BYTES
+    with client.stream("GET", url, headers=headers) as resp:
+        validators = {
+            "etag": resp.headers.get("etag", ""),
+            "last_modified": resp.headers.get("last-modified", ""),
+        }
+        if resp.status_code == 304:
+            return "not_modified", None, validators
+        resp.raise_for_status()
+        ctype = (resp.headers.get("content-type") or "").lower()
+        if "html" not in ctype:
+            logger.info("Fuente omitida (content-type %s): %s", ctype or "desconocido", url)
+            return "skipped", None, validators
+        try:
+            declared = int(resp.headers.get("content-length") or 0)
+        except ValueError:
+            declared = 0
+        if declared > max_bytes:
+            logger.warning(
+                "Fuente omitida (%d bytes > SOURCE_FETCH_MAX_BYTES=%d): %s",
+                declared, max_bytes, url,
+            )
+            return "skipped", None, validators
+
+        try:
+            decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        extractor = _new_extractor()
+        received = 0
+        for chunk in resp.iter_bytes():
+            received += len(chunk)
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done:
+                logger.debug("Extracción completa tras %d bytes: %s", received, url)
+                break
+            if received > max_bytes:
+                logger.warning(
+                    "Descarga cortada en %d bytes (SOURCE_FETCH_MAX_BYTES=%d): %s",
+                    received, max_bytes, url,
+                )
+                break
+        else:
+            extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+    return "ok", extractor, validators
+
+
+# --- Cache de extracciones en disco (DATA_DIR/sources/<sha256(url)>.json) ---
+#
+# Entries younger than SOURCE_CACHE_TTL_HOURS are served without touching the
+# network; older ones are revalidated with If-None-Match / If-Modified-Since.
+# Each read bumps the file mtime, so size eviction drops least-recently-used
+# entries first.
+
+_CACHE_STATS = {"hits": 0, "revalidated": 0, "stale": 0, "misses": 0}
+_CACHE_LOCK = threading.Lock()
+
+
+def _record_cache(outcome: str) -> None:
+    with _CACHE_LOCK:
+        _CACHE_STATS[outcome] += 1
+
+
+def cache_stats() -> dict[str, int]:
+    """Process-wide source cache counters: hits, revalidated (304), stale and misses.
+
+    ``stale`` counts expired entries served only because the fetch failed;
+    they are not hits.
+    """
+    with _CACHE_LOCK:
+        return dict(_CACHE_STATS)
+
+
+def _log_cache_stats() -> None:
+    stats = cache_stats()
+    total = sum(stats.values())
+    if not total:
+        return
+    served = stats["hits"] + stats["revalidated"]
+    logger.info(
+        "Cache de fuentes: hits=%d, revalidadas=%d, vencidas por error=%d, misses=%d (hit rate %.0f%%)",
+        stats["hits"], stats["revalidated"], stats["stale"], stats["misses"], 100.0 * served / total,
+    )
+
+
+def _cache_path(url: str) -> Path:
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return config.DATA_DIR / "sources" / f"{digest}.json"
+
+
+def _load_cached(url: str) -> dict | None:
+    path = _cache_path(url)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Cache de fuente ilegible (%s): %s", path.name, exc)
+        return None
+    if not isinstance(data, dict) or data.get("url") != url:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def _is_fresh(entry: dict) -> bool:
+    try:
+        fetched_at = datetime.fromisoformat(str(entry.get("fetched_at", "")))
+    except ValueError:
+        return False
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    age = (datetime.now(timezone.utc) - fetched_at).total_seconds()
+    return age < config.SOURCE_CACHE_TTL_HOURS * 3600
+
+
+def _conditional_headers(entry: dict | None) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _evict_cache() -> None:
+    """Delete least-recently-used entries until the directory fits SOURCE_CACHE_MAX_MB."""
+    max_bytes = int(config.SOURCE_CACHE_MAX_MB * 1024 * 1024)
+    if max_bytes <= 0:
+        return
+    cache_dir = config.DATA_DIR / "sources"
+    with _CACHE_LOCK:
+        entries = []
+        for path in cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+    logger.info("Cache de fuentes: %d entradas desalojadas por tamaño", removed)
+
+
+def _save_cached(
+    url: str,
+    source_text: str,
+    published_at: str,
+    author: str,
+    validators: dict[str, str] | None = None,
+) -> None:
+    """Write the extraction atomically so concurrent readers never see half a file."""
+    path = _cache_path(url)
+    validators = validators or {}
+    payload = {
+        "url": url,
+        "source_text": source_text,
+        "source_published_at": published_at,
+        "source_author": author,
+        "etag": validators.get("etag", ""),
+        "last_modified": validators.get("last_modified", ""),
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except Exception as exc:
+        logger.warning("No se pudo guardar cache de fuente para %s: %s", url, exc)
+        return
+    _evict_cache()
+
+
+def _with_source(article: SearchResult, data: dict) -> SearchResult:
+    if not data.get("source_text"):
+        return article
+    return replace(
+        article,
+        source_text=data["source_text"],
+        source_published_at=data.get("source_published_at", ""),
+        source_author=data.get("source_author", ""),
+    )
+
+
 def enrich_article(article: SearchResult) -> SearchResult:
-    """Fetch source article and return enriched SearchResult."""
+    """Fetch source article and return enriched SearchResult.
+
+    Extractions (including pages that yielded no text) are cached under
+    DATA_DIR/sources, so a retried run never downloads the same page twice.
+    """
     if not config.SOURCE_FETCH_ENABLED:
         return article
+    cached = _load_cached(article.url)
+    if cached is not None and _is_fresh(cached):
+        _record_cache("hits")
+        logger.info("Fuente desde cache (%d chars): %s", len(cached.get("source_text", "")), article.url)
+        return _with_source(article, cached)
+
     try:
-        with httpx.Client(
-            timeout=25,
-            follow_redirects=True,
-            headers={"User-Agent": USER_AGENT},
-        ) as client:
-            resp = client.get(article.url)
-            resp.raise_for_status()
+        status, extractor, validators = _stream_extract(
+            _get_client(), article.url, headers=_conditional_headers(cached)
+        )
     except Exception as exc:
         logger.warning("Could not fetch source '%s': %s", article.url, exc)
+        if cached is not None:
+            # Stale copy beats a snippet-only post when the source is unreachable.
+            _record_cache("stale")
+            return _with_source(article, cached)
         return article
 
-    ctype = (resp.headers.get("content-type") or "").lower()
-    if "html" not in ctype:
+    if status == "not_modified" and cached is not None:
+        _record_cache("revalidated")
+        _save_cached(
+            article.url,
+            cached.get("source_text", ""),
+            cached.get("source_published_at", ""),
+            cached.get("source_author", ""),
+            {
+                "etag": validators["etag"] or cached.get("etag", ""),
+                "last_modified": validators["last_modified"] or cached.get("last_modified", ""),
+            },
+        )
+        logger.info("Fuente revalidada (304): %s", article.url)
+        return _with_source(article, cached)
+    _record_cache("misses")
+    if extractor is None:
+        _save_cached(article.url, "", "", "", validators)
         return article
 
     try:
-        soup = BeautifulSoup(resp.text, "html.parser")
-        source_text = _extract_text(soup, config.SOURCE_FETCH_MAX_CHARS)
-        published_at, author = _extract_meta(soup)
-        if not source_text:
-            return article
-        logger.info(
-            "Source extracted (%d chars) for %s",
-            len(source_text), article.url,
-        )
-        return SearchResult(
-            title=article.title,
-            url=article.url,
-            snippet=article.snippet,
-            source_text=source_text,
-            source_published_at=published_at,
-            source_author=author,
-        )
+        source_text = extractor.text()
+        published_at, author = extractor.published_at, extractor.author
     except Exception as exc:
         logger.warning("Source extraction failed for '%s': %s", article.url, exc)
         return article
+    _save_cached(article.url, source_text, published_at, author, validators)
+    if not source_text:
+        return article
+    logger.info(
+        "Source extracted (%d chars) for %s",
+        len(source_text), article.url,
+    )
+    return SearchResult(
+        title=article.title,
+        url=article.url,
+        snippet=article.snippet,
+        source_text=source_text,
+        source_published_at=published_at,
+        source_author=author,
+    )
+
+
+def _has_usable_text(article: SearchResult) -> bool:
+    return len(article.source_text or "") >= config.SOURCE_MIN_TEXT_CHARS
+
+
+def enrich_best_candidate(
+    ranked: list[tuple[SearchResult, float]],
+    top_n: int | None = None,
+) -> tuple[SearchResult, float]:
+    """Enrich the top-N ranked candidates concurrently and pick the best usable one.
+
+    Returns the highest-ranked candidate whose source yielded at least
+    SOURCE_MIN_TEXT_CHARS of text; if none did, the top candidate as enriched.
+    Lower-ranked fetches still queued are cancelled once the winner is known.
+    """
+    top_n = config.SOURCE_PREFETCH_TOP_N if top_n is None else top_n
+    candidates = ranked[: max(1, top_n)]
+    if not config.SOURCE_FETCH_ENABLED or len(candidates) == 1:
+        article, score = candidates[0]
+        article = enrich_article(article)
+        _log_cache_stats()
+        return article, score
+
+    enriched: dict[int, SearchResult] = {}
+    chosen: int | None = None
+    pool = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="source")
+    try:
+        futures = {
+            pool.submit(enrich_article, article): index
+            for index, (article, _) in enumerate(candidates)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                enriched[index] = future.result()
+            except Exception as exc:
+                logger.warning("Enriquecimiento fallido para %s: %s", candidates[index][0].url, exc)
+                enriched[index] = candidates[index][0]
+            # The winner is decided once every higher-ranked candidate has finished.
+            for rank in range(len(candidates)):
+                if rank not in enriched:
+                    break
+                if _has_usable_text(enriched[rank]):
+                    chosen = rank
+                    break
+            if chosen is not None:
+                break
+    finally:
+        # Fetches already running finish in the background and still fill the cache.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    _log_cache_stats()
+    if chosen is None:
+        logger.warning(
+            "Ninguno de los %d mejores candidatos tiene texto de fuente suficiente (>= %d chars)",
+            len(candidates), config.SOURCE_MIN_TEXT_CHARS,
+        )
+        chosen = 0
+    elif chosen > 0:
+        logger.info(
+            "Candidato #%d elegido por texto de fuente utilizable (los anteriores eran escasos): %s",
+            chosen + 1, candidates[chosen][0].title,
+        )
+    return enriched.get(chosen, candidates[chosen][0]), candidates[chosen][1]
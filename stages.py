@@ -0,0 +1,95 @@
+"""Ejecutor de etapas con dependencias: cada etapa arranca en cuanto sus entradas existen.
+
+Uso típico en el pipeline: generación de imagen, posts recientes, higiene de
+enlaces, SEO y resolución de términos/autor corren en paralelo donde no dependen
+entre sí. Una etapa (p. ej. el gate SEO) puede llamar a ``cancel()`` para que no
+arranque nada más.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Stage:
+    name: str
+    func: Callable[..., Any]
+    deps: tuple[str, ...]
+
+
+class StageGraph:
+    """Run callables as soon as the stages they depend on have finished.
+
+    Each stage receives its dependencies' results as positional arguments,
+    in the order given by ``deps``.
+    """
+
+    def __init__(self, name: str = "pipeline", max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self._stages: dict[str, _Stage] = {}
+        self._cancelled = threading.Event()
+        self.cancel_reason = ""
+
+    def add(self, name: str, func: Callable[..., Any], deps: tuple[str, ...] = ()) -> None:
+        if name in self._stages:
+            raise ValueError(f"Etapa duplicada: {name}")
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            raise ValueError(f"La etapa '{name}' depende de etapas no registradas: {missing}")
+        self._stages[name] = _Stage(name=name, func=func, deps=tuple(deps))
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = "") -> None:
+        """Stop scheduling new stages; stages already running are left to finish."""
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+            logger.info("Etapas [%s] canceladas: %s", self.name, reason or "sin motivo")
+
+    def run(self) -> dict[str, Any]:
+        """Execute the graph and return {stage: result} for the stages that ran.
+
+        The first stage exception cancels everything not yet started and is
+        re-raised once running stages have finished.
+        """
+        results: dict[str, Any] = {}
+        waiting = dict(self._stages)
+        running: dict[Future, str] = {}
+        error: BaseException | None = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as pool:
+            while True:
+                if not self.cancelled and error is None:
+                    for name, stage in list(waiting.items()):
+                        if all(dep in results for dep in stage.deps):
+                            del waiting[name]
+                            args = [results[dep] for dep in stage.deps]
+                            running[pool.submit(stage.func, *args)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException as exc:
+                        if error is None:
+                            error = exc
+                            self.cancel(f"fallo en etapa '{name}': {exc}")
+
+        if error is not None:
+            raise error
+        if waiting and self.cancelled:
+            logger.info("Etapas [%s] no ejecutadas: %s", self.name, ", ".join(waiting))
+        return results
@@ -1,10 +1,13 @@
 """SQLite state management by topic to avoid processing duplicates."""
 
+import atexit
 import sqlite3
 import logging
 import json
-from datetime import datetime, timezone
-from pathlib import Path
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
 
 import config
 
@@ -35,18 +38,70 @@ CREATE TABLE IF NOT EXISTS seo_reports (
 )
 """
 
+_CREATE_SEARCH_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    cache_key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    query TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
 
-def _connect() -> sqlite3.Connection:
-    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(config.DB_PATH)
-    conn.execute(_CREATE_TABLE)
-    conn.execute(_CREATE_SEO_REPORTS_TABLE)
-    conn.commit()
-    return conn
+_CREATE_SCORE_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS score_cache (
+    cache_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    topic_name TEXT NOT NULL,
+    model TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+
+_CREATE_CACHE_META_TABLE = """
+CREATE TABLE IF NOT EXISTS cache_meta (
+    cache_name TEXT PRIMARY KEY,
+    refreshed_at TEXT NOT NULL
+)
+"""
+
+_CREATE_WP_TERMS_TABLE = """
+CREATE TABLE IF NOT EXISTS wp_terms (
+    taxonomy TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    term_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (taxonomy, name_key)
+)
+"""
+
+_CREATE_WP_AUTHORS_TABLE = """
+CREATE TABLE IF NOT EXISTS wp_authors (
+    name_key TEXT PRIMARY KEY,
+    author_id INTEGER NOT NULL,
+    author_name TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+)
+"""
+
+_CREATE_LINK_HEALTH_TABLE = """
+CREATE TABLE IF NOT EXISTS link_health (
+    url TEXT PRIMARY KEY,
+    ok INTEGER NOT NULL,
+    status_code INTEGER NOT NULL DEFAULT 0,
+    final_url TEXT NOT NULL DEFAULT '',
+    checked_at TEXT NOT NULL
+)
+"""
 
 
-def _migrate_if_needed(conn: sqlite3.Connection) -> None:
+def _migrate_legacy_schema(conn: sqlite3.Connection) -> None:
     """Migrate old single-key table to topic-aware schema if needed."""
+    conn.execute(_CREATE_TABLE)
+    conn.execute(_CREATE_SEO_REPORTS_TABLE)
     cols = {
         row[1] for row in conn.execute("PRAGMA table_info(processed_articles)").fetchall()
     }
@@ -64,12 +119,97 @@ def _migrate_if_needed(conn: sqlite3.Connection) -> None:
         [("default", *row) for row in rows],
     )
     conn.execute("DROP TABLE processed_articles_old")
-    conn.commit()
+
+
+def _create_cache_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(_CREATE_SEARCH_CACHE_TABLE)
+    conn.execute(_CREATE_SCORE_CACHE_TABLE)
+    conn.execute(_CREATE_CACHE_META_TABLE)
+    conn.execute(_CREATE_WP_TERMS_TABLE)
+    conn.execute(_CREATE_WP_AUTHORS_TABLE)
+
+
+def _add_processed_indexes(conn: sqlite3.Connection) -> None:
+    # The trailing columns make both indexes covering: the "last published"
+    # lookups and per-topic counts never touch the table rows.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_processed_status_created "
+        "ON processed_articles (status, created_at, topic_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_processed_topic_status "
+        "ON processed_articles (topic_id, status, created_at)"
+    )
+    conn.execute("ANALYZE processed_articles")
+
+
+def _create_link_health_table(conn: sqlite3.Connection) -> None:
+    conn.execute(_CREATE_LINK_HEALTH_TABLE)
+
+
+# Ordered schema steps; PRAGMA user_version records how many have been applied.
+# Every step is idempotent so databases created before user_version existed
+# upgrade cleanly. Append new steps, never reorder or edit applied ones.
+_MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migrate_legacy_schema,
+    _create_cache_tables,
+    _add_processed_indexes,
+    _create_link_health_table,
+]
+
+_CONN: sqlite3.Connection | None = None
+_CONN_LOCK = threading.RLock()
+
+
+def _run_migrations(conn: sqlite3.Connection) -> None:
+    version = int(conn.execute("PRAGMA user_version").fetchone()[0])
+    for target, step in enumerate(_MIGRATIONS, start=1):
+        if version >= target:
+            continue
+        with conn:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+        logger.info("Esquema de estado migrado a versión %d (%s)", target, step.__name__)
+
+
+def _open_connection() -> sqlite3.Connection:
+    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(config.DB_PATH, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-8000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    _run_migrations(conn)
+    return conn
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """Yield the process-wide connection inside a transaction.
+
+    The connection is opened (and the schema migrated) once per process; the
+    lock serializes access from worker threads.
+    """
+    global _CONN
+    with _CONN_LOCK:
+        if _CONN is None:
+            _CONN = _open_connection()
+            atexit.register(close)
+        with _CONN:
+            yield _CONN
+
+
+def close() -> None:
+    """Close the shared connection (safe to call more than once)."""
+    global _CONN
+    with _CONN_LOCK:
+        if _CONN is not None:
+            _CONN.close()
+            _CONN = None
 
 
 def is_processed(url: str, topic_id: str = "default") -> bool:
     with _connect() as conn:
-        _migrate_if_needed(conn)
         row = conn.execute(
             "SELECT 1 FROM processed_articles WHERE topic_id = ? AND url = ?",
             (topic_id, url),
@@ -86,7 +226,6 @@ def mark_processed(
     topic_id: str = "default",
 ) -> None:
     with _connect() as conn:
-        _migrate_if_needed(conn)
         conn.execute(
             """INSERT OR REPLACE INTO processed_articles
                (topic_id, url, title, score, wp_post_id, status, created_at)
@@ -103,12 +242,30 @@ def mark_processed(
     )
 
 
+def get_processed(url: str, topic_id: str = "default") -> dict | None:
+    """Return the processed_articles row for (topic_id, url) as a dict, if any."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT title, score, wp_post_id, status, created_at FROM processed_articles "
+            "WHERE topic_id = ? AND url = ?",
+            (topic_id, url),
+        ).fetchone()
+    if row is None:
+        return None
+    return {
+        "title": row[0] or "",
+        "score": row[1],
+        "wp_post_id": row[2],
+        "status": row[3] or "",
+        "created_at": row[4] or "",
+    }
+
+
 def get_all_processed_urls(
     topic_id: str = "default",
     statuses: tuple[str, ...] | None = None,
 ) -> set[str]:
     with _connect() as conn:
-        _migrate_if_needed(conn)
         sql = "SELECT url FROM processed_articles WHERE topic_id = ?"
         params: list[str] = [topic_id]
         if statuses:
@@ -119,6 +276,45 @@ def get_all_processed_urls(
         return {row[0] for row in rows}
 
 
+def filter_processed(
+    pairs: list[tuple[str, str]],
+    statuses: tuple[str, ...] | None = None,
+    exclude_statuses: tuple[str, ...] | None = None,
+) -> set[tuple[str, str]]:
+    """Return the subset of (topic_id, url) pairs already processed, in one query.
+
+    ``statuses`` keeps only rows in those states; ``exclude_statuses`` ignores
+    rows in those states (e.g. checkpoints of unfinished work).
+    """
+    unique_pairs = list(dict.fromkeys(pairs))
+    if not unique_pairs:
+        return set()
+    sql = (
+        "SELECT DISTINCT pa.topic_id, pa.url FROM temp.lookup_pairs lp "
+        "JOIN processed_articles pa ON pa.topic_id = lp.topic_id AND pa.url = lp.url"
+    )
+    params: list[str] = []
+    conditions: list[str] = []
+    if statuses:
+        conditions.append(f"pa.status IN ({','.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if exclude_statuses:
+        conditions.append(f"pa.status NOT IN ({','.join('?' for _ in exclude_statuses)})")
+        params.extend(exclude_statuses)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    with _connect() as conn:
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS lookup_pairs "
+            "(topic_id TEXT NOT NULL, url TEXT NOT NULL)"
+        )
+        conn.execute("DELETE FROM temp.lookup_pairs")
+        conn.executemany("INSERT INTO temp.lookup_pairs (topic_id, url) VALUES (?, ?)", unique_pairs)
+        rows = conn.execute(sql, params).fetchall()
+        conn.execute("DELETE FROM temp.lookup_pairs")
+    return {(str(topic_id), str(url)) for topic_id, url in rows}
+
+
 def _parse_created_at(value: str) -> datetime | None:
     raw = (value or "").strip()
     if not raw:
@@ -153,7 +349,6 @@ def get_last_published_at(
     sql += " ORDER BY created_at DESC LIMIT 1"
 
     with _connect() as conn:
-        _migrate_if_needed(conn)
         row = conn.execute(sql, params).fetchone()
     if not row:
         return None
@@ -172,7 +367,6 @@ def get_last_published_topic_id(
         "ORDER BY created_at DESC LIMIT 1"
     )
     with _connect() as conn:
-        _migrate_if_needed(conn)
         row = conn.execute(sql, list(statuses)).fetchone()
     if not row:
         return None
@@ -197,7 +391,6 @@ def count_processed_by_status(
         params.append(topic_id)
 
     with _connect() as conn:
-        _migrate_if_needed(conn)
         row = conn.execute(sql, params).fetchone()
     if not row:
         return 0
@@ -217,7 +410,6 @@ def save_seo_report(
 ) -> None:
     serialized = json.dumps(payload, ensure_ascii=False)
     with _connect() as conn:
-        _migrate_if_needed(conn)
         conn.execute(
             """INSERT OR REPLACE INTO seo_reports
                (topic_id, url, truseo_score, headline_score, payload_json, created_at)
@@ -236,7 +428,6 @@ def save_seo_report(
 
 def get_seo_report(topic_id: str, url: str) -> dict | None:
     with _connect() as conn:
-        _migrate_if_needed(conn)
         row = conn.execute(
             "SELECT payload_json FROM seo_reports WHERE topic_id = ? AND url = ?",
             (topic_id, url),
@@ -249,8 +440,317 @@ def get_seo_report(topic_id: str, url: str) -> dict | None:
         return None
 
 
+def _utc_cutoff(max_age_seconds: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)).isoformat()
+
+
+def get_search_cache(cache_key: str, max_age_seconds: float) -> list[dict] | None:
+    """Return cached raw provider items if younger than ``max_age_seconds``."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT payload_json FROM search_cache WHERE cache_key = ? AND created_at >= ?",
+            (cache_key, _utc_cutoff(max_age_seconds)),
+        ).fetchone()
+    if not row:
+        return None
+    try:
+        items = json.loads(str(row[0]))
+    except json.JSONDecodeError:
+        return None
+    return items if isinstance(items, list) else None
+
+
+def save_search_cache(
+    *,
+    cache_key: str,
+    provider: str,
+    query: str,
+    items: list[dict],
+    max_age_seconds: float,
+    max_bytes: int,
+) -> None:
+    """Store raw provider items, dropping expired rows and oldest rows over ``max_bytes``."""
+    serialized = json.dumps(items, ensure_ascii=False)
+    size_bytes = len(serialized.encode("utf-8"))
+    with _connect() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO search_cache
+               (cache_key, provider, query, payload_json, size_bytes, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (
+                cache_key, provider, query, serialized, size_bytes,
+                datetime.now(timezone.utc).isoformat(),
+            ),
+        )
+        conn.execute(
+            "DELETE FROM search_cache WHERE created_at < ?",
+            (_utc_cutoff(max_age_seconds),),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM search_cache").fetchone()[0]
+        if max_bytes > 0 and total > max_bytes:
+            evict: list[str] = []
+            for key, row_size in conn.execute(
+                "SELECT cache_key, size_bytes FROM search_cache ORDER BY created_at ASC"
+            ).fetchall():
+                if total <= max_bytes:
+                    break
+                evict.append(key)
+                total -= row_size
+            conn.executemany(
+                "DELETE FROM search_cache WHERE cache_key = ?",
+                [(key,) for key in evict],
+            )
+            logger.info("Cache de búsqueda: %d entradas desalojadas por tamaño", len(evict))
+        conn.commit()
+
+
+def get_score_cache(cache_keys: list[str], max_age_seconds: float) -> dict[str, dict]:
+    """Return {cache_key: raw scoring payload} for fresh entries among ``cache_keys``."""
+    found: dict[str, dict] = {}
+    if not cache_keys:
+        return found
+    cutoff = _utc_cutoff(max_age_seconds)
+    with _connect() as conn:
+        for start in range(0, len(cache_keys), 500):
+            chunk = cache_keys[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                "SELECT cache_key, payload_json FROM score_cache "
+                f"WHERE cache_key IN ({placeholders}) AND created_at >= ?",
+                [*chunk, cutoff],
+            ).fetchall()
+            for key, payload_json in rows:
+                try:
+                    found[str(key)] = json.loads(str(payload_json))
+                except json.JSONDecodeError:
+                    continue
+    return found
+
+
+def save_score_cache(
+    *,
+    cache_key: str,
+    url: str,
+    topic_name: str,
+    model: str,
+    payload: dict,
+) -> None:
+    serialized = json.dumps(payload, ensure_ascii=False)
+    with _connect() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO score_cache
+               (cache_key, url, topic_name, model, payload_json, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (
+                cache_key, url, topic_name, model, serialized,
+                datetime.now(timezone.utc).isoformat(),
+            ),
+        )
+        conn.commit()
+
+
+def _is_cache_fresh(conn: sqlite3.Connection, cache_name: str, max_age_seconds: float) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM cache_meta WHERE cache_name = ? AND refreshed_at >= ?",
+        (cache_name, _utc_cutoff(max_age_seconds)),
+    ).fetchone()
+    return row is not None
+
+
+def _touch_cache(conn: sqlite3.Connection, cache_name: str) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_meta (cache_name, refreshed_at) VALUES (?, ?)",
+        (cache_name, datetime.now(timezone.utc).isoformat()),
+    )
+
+
+def get_wp_terms(taxonomy: str, max_age_seconds: float) -> dict[str, int] | None:
+    """Return the {name_key: term_id} index, or None if it is missing or stale."""
+    with _connect() as conn:
+        if not _is_cache_fresh(conn, f"wp_terms:{taxonomy}", max_age_seconds):
+            return None
+        rows = conn.execute(
+            "SELECT name_key, term_id FROM wp_terms WHERE taxonomy = ?",
+            (taxonomy,),
+        ).fetchall()
+    return {str(key): int(term_id) for key, term_id in rows}
+
+
+def replace_wp_terms(taxonomy: str, terms: dict[str, tuple[int, str]]) -> None:
+    """Replace the whole index of a taxonomy with a fresh {name_key: (id, name)} map."""
+    now = datetime.now(timezone.utc).isoformat()
+    with _connect() as conn:
+        conn.execute("DELETE FROM wp_terms WHERE taxonomy = ?", (taxonomy,))
+        conn.executemany(
+            """INSERT OR REPLACE INTO wp_terms
+               (taxonomy, name_key, term_id, name, fetched_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            [(taxonomy, key, term_id, name, now) for key, (term_id, name) in terms.items()],
+        )
+        _touch_cache(conn, f"wp_terms:{taxonomy}")
+        conn.commit()
+
+
+def save_wp_term(taxonomy: str, name_key: str, term_id: int, name: str) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO wp_terms
+               (taxonomy, name_key, term_id, name, fetched_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (taxonomy, name_key, term_id, name, datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+
+
+def get_wp_authors(max_age_seconds: float) -> dict[str, int] | None:
+    """Return the {name_key: author_id} cache, or None if the bulk warm-up is stale."""
+    with _connect() as conn:
+        if not _is_cache_fresh(conn, "wp_authors", max_age_seconds):
+            return None
+        rows = conn.execute("SELECT name_key, author_id FROM wp_authors").fetchall()
+    return {str(key): int(author_id) for key, author_id in rows}
+
+
+def replace_wp_authors(authors: dict[str, tuple[int, str]]) -> None:
+    """Replace the author cache with a fresh {name_key: (id, name)} warm-up result."""
+    now = datetime.now(timezone.utc).isoformat()
+    with _connect() as conn:
+        conn.execute("DELETE FROM wp_authors")
+        conn.executemany(
+            """INSERT OR REPLACE INTO wp_authors
+               (name_key, author_id, author_name, fetched_at)
+               VALUES (?, ?, ?, ?)""",
+            [(key, author_id, name, now) for key, (author_id, name) in authors.items()],
+        )
+        _touch_cache(conn, "wp_authors")
+        conn.commit()
+
+
+def save_wp_author(name_key: str, author_id: int, author_name: str) -> None:
+    with _connect() as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO wp_authors
+               (name_key, author_id, author_name, fetched_at)
+               VALUES (?, ?, ?, ?)""",
+            (name_key, author_id, author_name, datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+
+
+def get_link_health(
+    urls: list[str],
+    ok_max_age_seconds: float,
+    broken_max_age_seconds: float,
+) -> dict[str, bool]:
+    """Return {url: ok} for URLs whose last check is still fresh.
+
+    Healthy and broken results expire separately, so a dead link is retried
+    sooner than a healthy one is re-confirmed.
+    """
+    found: dict[str, bool] = {}
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return found
+    ok_cutoff = _utc_cutoff(ok_max_age_seconds)
+    broken_cutoff = _utc_cutoff(broken_max_age_seconds)
+    with _connect() as conn:
+        for start in range(0, len(unique_urls), 500):
+            chunk = unique_urls[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT url, ok FROM link_health WHERE url IN ({placeholders}) "
+                "AND ((ok = 1 AND checked_at >= ?) OR (ok = 0 AND checked_at >= ?))",
+                [*chunk, ok_cutoff, broken_cutoff],
+            ).fetchall()
+            for url, ok in rows:
+                found[str(url)] = bool(ok)
+    return found
+
+
+def save_link_health(results: list[tuple[str, bool, int, str]]) -> None:
+    """Upsert (url, ok, status_code, final_url) check results."""
+    if not results:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    with _connect() as conn:
+        conn.executemany(
+            """INSERT OR REPLACE INTO link_health
+               (url, ok, status_code, final_url, checked_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            [
+                (url, int(bool(ok)), int(status_code), final_url, now)
+                for url, ok, status_code, final_url in results
+            ],
+        )
+        conn.commit()
+
+
+def _benchmark_hot_lookups(rows: int = 100_000, max_ms: float = 1.0) -> bool:
+    """Seed a throwaway DB and check every hot lookup stays under ``max_ms``.
+
+    Each lookup is timed as the best of several rounds so scheduler noise
+    does not fail the check. Returns False if any lookup is over budget.
+    """
+    import random
+    import tempfile
+    import time
+    from pathlib import Path
+
+    original_path = config.DB_PATH
+    close()
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = Path(tmp) / "bench.db"
+        try:
+            statuses = ("processed", "published_draft", "dry_run", "seo_failed", "gen_failed")
+            with _connect() as conn:
+                conn.executemany(
+                    "INSERT INTO processed_articles (topic_id, url, status, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            f"topic_{i % 20}",
+                            f"https://example.com/{i}",
+                            random.choice(statuses),
+                            f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00",
+                        )
+                        for i in range(rows)
+                    ],
+                )
+                conn.execute("ANALYZE")
+            checks = [
+                ("get_last_published_at", lambda: get_last_published_at()),
+                ("get_last_published_at[topic]", lambda: get_last_published_at(topic_id="topic_3")),
+                ("get_last_published_topic_id", lambda: get_last_published_topic_id()),
+                ("count_processed_by_status[topic]", lambda: count_processed_by_status(topic_id="topic_3")),
+                # Production form (main._is_publish_due): no topic filter. COUNT(*) walks the
+                # matching range of idx_processed_status_created, ~0.6 ms at 100k rows.
+                ("count_processed_by_status", lambda: count_processed_by_status(statuses=("published_draft",))),
+            ]
+            ok = True
+            for name, call in checks:
+                call()
+                timings = []
+                for _ in range(5):
+                    t0 = time.perf_counter()
+                    for _ in range(200):
+                        call()
+                    timings.append((time.perf_counter() - t0) / 200 * 1000)
+                elapsed_ms = min(timings)
+                within = elapsed_ms < max_ms
+                ok = ok and within
+                print(f"{name}: {elapsed_ms:.4f} ms ({rows} filas) {'OK' if within else f'>= {max_ms} ms'}")
+            return ok
+        finally:
+            close()
+            config.DB_PATH = original_path
+
+
 if __name__ == "__main__":
+    import sys
+
     config.setup_logging()
+    if "--bench" in sys.argv:
+        sys.exit(0 if _benchmark_hot_lookups() else 1)
     mark_processed("https://example.com/test", title="Test", score=0.8)
     print("Is processed:", is_processed("https://example.com/test"))
     print("All URLs:", get_all_processed_urls())
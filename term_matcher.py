@@ -0,0 +1,88 @@
+"""Detección de términos bloqueados con una sola expresión regular precompilada.
+
+Los términos (``BLOCKED_SOURCE_TERMS`` / ``BLOCKED_MENTION_TERMS``) se normalizan
+una vez y se combinan en una alternancia ordenada de mayor a menor longitud. Los
+términos cortos (p. ej. "ami") solo cuentan como token completo. Varios campos
+se revisan en una única pasada uniéndolos con saltos de línea y cada coincidencia
+se reporta con el campo donde apareció.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+
+# Terms up to this length without spaces must match a whole token.
+SHORT_TERM_MAX_LEN = 3
+_FIELD_SEPARATOR = "\n"
+
+
+@dataclass(frozen=True)
+class TermHit:
+    term: str
+    field: str
+    start: int
+    end: int
+
+
+class TermMatcher:
+    """Match many blocked terms against one or more text fields in one scan.
+
+    ``normalize`` is applied to terms and fields alike; it must not produce
+    newlines (whitespace-collapsing normalizers never do). Offsets in hits
+    refer to the normalized field text.
+    """
+
+    def __init__(self, terms: Iterable[str], normalize: Callable[[str], str]):
+        self._normalize = normalize
+        self._terms: dict[str, str] = {}
+        for term in terms:
+            needle = normalize(term)
+            if needle and needle not in self._terms:
+                self._terms[needle] = term
+        alternatives = []
+        for needle in sorted(self._terms, key=len, reverse=True):
+            escaped = re.escape(needle)
+            if len(needle) <= SHORT_TERM_MAX_LEN and " " not in needle:
+                escaped = rf"(?<!\S){escaped}(?!\S)"
+            alternatives.append(escaped)
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def _haystack(self, fields: Mapping[str, str]) -> tuple[str, list[int], list[str]]:
+        names = list(fields)
+        starts: list[int] = []
+        parts: list[str] = []
+        offset = 0
+        for name in names:
+            text = self._normalize(fields[name] or "")
+            starts.append(offset)
+            parts.append(text)
+            offset += len(text) + len(_FIELD_SEPARATOR)
+        return _FIELD_SEPARATOR.join(parts), starts, names
+
+    def _hit(self, match: re.Match, starts: list[int], names: list[str]) -> TermHit:
+        idx = bisect.bisect_right(starts, match.start()) - 1
+        base = starts[idx]
+        return TermHit(
+            term=self._terms[match.group(0)],
+            field=names[idx],
+            start=match.start() - base,
+            end=match.end() - base,
+        )
+
+    def scan(self, fields: Mapping[str, str]) -> list[TermHit]:
+        """Return every non-overlapping hit across ``fields``, in field order."""
+        if self._pattern is None:
+            return []
+        haystack, starts, names = self._haystack(fields)
+        return [self._hit(m, starts, names) for m in self._pattern.finditer(haystack)]
+
+    def first(self, fields: Mapping[str, str]) -> TermHit | None:
+        """Return the earliest hit, stopping the scan there."""
+        if self._pattern is None:
+            return None
+        haystack, starts, names = self._haystack(fields)
+        match = self._pattern.search(haystack)
+        return self._hit(match, starts, names) if match else None
@@ -21,6 +21,7 @@ class TopicProfile:
     scoring_guidelines: str
     writing_guidelines: str
     tone_file: str = ""
+    prefilter_top_k: int = config.SCORER_PREFILTER_TOP_K
 
 
 def _normalize_topic(raw: dict) -> TopicProfile:
@@ -39,6 +40,9 @@ def _normalize_topic(raw: dict) -> TopicProfile:
     scoring_guidelines = str(raw.get("scoring_guidelines", "")).strip()
     writing_guidelines = str(raw.get("writing_guidelines", "")).strip()
     tone_file = str(raw.get("tone_file", "")).strip()
+    prefilter_top_k = int(raw.get("prefilter_top_k", config.SCORER_PREFILTER_TOP_K))
+    if prefilter_top_k < 0:
+        raise ValueError(f"Topic '{topic_id}' has negative prefilter_top_k")
     return TopicProfile(
         topic_id=topic_id,
         name=name,
@@ -51,6 +55,7 @@ def _normalize_topic(raw: dict) -> TopicProfile:
         scoring_guidelines=scoring_guidelines,
         writing_guidelines=writing_guidelines,
         tone_file=tone_file,
+        prefilter_top_k=prefilter_top_k,
     )
 
 
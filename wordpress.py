@@ -1,24 +1,42 @@
 """Cliente REST API de WordPress: sube media y crea borradores."""
 
+import atexit
 import base64
 import hashlib
+import importlib.util
 import logging
 import re
 import random
+import threading
 import time
 import unicodedata
 from html import unescape
 from pathlib import Path
+from typing import Callable
 from urllib.parse import urljoin
 from urllib.parse import quote, urlparse
 
 import httpx
 
 import config
+import cuadernillo_source
+import state
+import topics
 from content import GeneratedPost
+from ratelimit import TokenBucket, service_limiter
 
 logger = logging.getLogger(__name__)
 _AUTHOR_CACHE: dict[str, int] = {}
+_AUTHOR_LOCK = threading.Lock()
+_AUTHORS_WARMED = False
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+_SG_LOCK = threading.Lock()
+_TERM_INDEX: dict[str, dict[str, int]] = {}
+# Taxonomies whose index could not be fetched this run: resolve term by term
+# instead of paging the whole taxonomy again on every lookup.
+_TERM_INDEX_FAILED: set[str] = set()
+_TERM_LOCK = threading.Lock()
 _SG_REFRESH_RE = re.compile(r'content="0;([^"]+)"', re.IGNORECASE)
 _SG_CHALLENGE_RE = re.compile(r'const sgchallenge="([^"]+)";')
 _SG_SUBMIT_RE = re.compile(r'const sgsubmit_url="([^"]+)";')
@@ -75,7 +93,7 @@ def _try_solve_sgcaptcha(client: httpx.Client, endpoint_url: str, resp: httpx.Re
     refresh_url = urljoin(config.WP_SITE_URL + "/", unescape(refresh_match.group(1)))
 
     try:
-        challenge_resp = client.get(refresh_url)
+        challenge_resp = _send(client, "get", refresh_url)
     except Exception:
         return False
     if challenge_resp.status_code >= 400:
@@ -88,7 +106,7 @@ def _try_solve_sgcaptcha(client: httpx.Client, endpoint_url: str, resp: httpx.Re
             f"/.well-known/sgcaptcha/?r={quote(path_query, safe='')}",
         )
         try:
-            challenge_resp = client.get(fallback_refresh)
+            challenge_resp = _send(client, "get", fallback_refresh)
         except Exception:
             return False
         if challenge_resp.status_code >= 400:
@@ -111,11 +129,11 @@ def _try_solve_sgcaptcha(client: httpx.Client, endpoint_url: str, resp: httpx.Re
     sep = "&" if "?" in submit_url else "?"
     token_url = f"{submit_url}{sep}sol={solution}&s={int(elapsed * 1000)}:{hashes}"
     try:
-        client.get(token_url)
+        _send(client, "get", token_url)
     except Exception:
         return False
 
-    verify = client.get(endpoint_url)
+    verify = _send(client, "get", endpoint_url)
     if _is_sgcaptcha_html(verify):
         logger.warning("sgcaptcha persistió para %s", endpoint_url)
         return False
@@ -127,6 +145,46 @@ def _auth() -> tuple[str, str]:
     return (config.WP_USERNAME, config.WP_APP_PASSWORD)
 
 
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _get_client() -> httpx.Client:
+    """Return the shared keep-alive WordPress client.
+
+    The cookie jar lives as long as the client, so SiteGround challenge
+    cookies obtained by ``_try_solve_sgcaptcha`` are reused by later calls.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            use_http2 = config.WP_HTTP2 and _http2_available()
+            _CLIENT = httpx.Client(
+                timeout=60,
+                auth=_auth(),
+                http2=use_http2,
+                limits=httpx.Limits(
+                    max_connections=config.WP_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.WP_HTTP_MAX_KEEPALIVE,
+                ),
+            )
+            atexit.register(close_client)
+            logger.info(
+                "Cliente WordPress creado (http2=%s, max_connections=%d)",
+                use_http2, config.WP_HTTP_MAX_CONNECTIONS,
+            )
+        return _CLIENT
+
+
+def close_client() -> None:
+    """Close the shared WordPress client (safe to call more than once)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
 def _api_url(endpoint: str) -> str:
     return f"{config.WP_SITE_URL}/wp-json/wp/v2/{endpoint}"
 
@@ -155,36 +213,53 @@ def _normalize_name(value: str) -> str:
     return re.sub(r"\s+", " ", value).strip()
 
 
+def _wp_limiter() -> TokenBucket:
+    return service_limiter("wordpress", config.WP_REQUESTS_PER_SECOND)
+
+
+def _send(client: httpx.Client, method: str, url: str, **kwargs) -> httpx.Response:
+    """Issue one HTTP call to the WordPress host, taking a limiter token first.
+
+    Every attempt goes through here (retries and sgcaptcha round-trips
+    included) so concurrent callers cannot burst past WP_REQUESTS_PER_SECOND.
+    """
+    _wp_limiter().acquire()
+    return getattr(client, method)(url, **kwargs)
+
+
 def _request(
     method: str, endpoint: str, retry_on_500: bool = True, **kwargs
 ) -> httpx.Response | None:
     """Make an authenticated WP REST API request."""
     url = _api_url(endpoint)
-    with httpx.Client(timeout=60, auth=_auth()) as client:
-        try:
-            resp = getattr(client, method)(url, **kwargs)
-            if _is_sgcaptcha_html(resp):
-                solved = _try_solve_sgcaptcha(client, url, resp)
-                if solved:
-                    resp = getattr(client, method)(url, **kwargs)
-            if _is_sgcaptcha_html(resp):
-                logger.error("WordPress blocked by sgcaptcha: %s %s", method.upper(), url)
-                return None
-            if resp.status_code == 401:
-                logger.error("WordPress auth failed (401). Check credentials.")
-                return None
-            if resp.status_code >= 500 and retry_on_500:
-                logger.warning("WordPress 500 error, retrying once in 5s...")
-                time.sleep(5)
-                resp = getattr(client, method)(url, **kwargs)
-            resp.raise_for_status()
-            return resp
-        except httpx.HTTPStatusError as exc:
-            logger.error("WordPress API error: %s %s -> %s", method.upper(), url, exc)
+    client = _get_client()
+    try:
+        resp = _send(client, method, url, **kwargs)
+        if _is_sgcaptcha_html(resp):
+            # One solver at a time; a concurrent caller may already have
+            # refreshed the shared cookies, so retry before solving again.
+            with _SG_LOCK:
+                resp = _send(client, method, url, **kwargs)
+                if _is_sgcaptcha_html(resp) and _try_solve_sgcaptcha(client, url, resp):
+                    resp = _send(client, method, url, **kwargs)
+        if _is_sgcaptcha_html(resp):
+            logger.error("WordPress blocked by sgcaptcha: %s %s", method.upper(), url)
             return None
-        except httpx.RequestError as exc:
-            logger.error("WordPress request failed: %s", exc)
+        if resp.status_code == 401:
+            logger.error("WordPress auth failed (401). Check credentials.")
             return None
+        if resp.status_code >= 500 and retry_on_500:
+            logger.warning("WordPress 500 error, retrying once in 5s...")
+            time.sleep(5)
+            resp = _send(client, method, url, **kwargs)
+        resp.raise_for_status()
+        return resp
+    except httpx.HTTPStatusError as exc:
+        logger.error("WordPress API error: %s %s -> %s", method.upper(), url, exc)
+        return None
+    except httpx.RequestError as exc:
+        logger.error("WordPress request failed: %s", exc)
+        return None
 
 
 def _aioseo_request(
@@ -192,37 +267,126 @@ def _aioseo_request(
 ) -> httpx.Response | None:
     """Make an authenticated AIOSEO REST API request."""
     url = _aioseo_url(endpoint)
-    with httpx.Client(timeout=60, auth=_auth()) as client:
+    client = _get_client()
+    try:
+        resp = _send(client, method, url, **kwargs)
+        if resp.status_code >= 500 and retry_on_500:
+            logger.warning("AIOSEO API 500, retrying once in 5s...")
+            time.sleep(5)
+            resp = _send(client, method, url, **kwargs)
+        resp.raise_for_status()
+        return resp
+    except httpx.HTTPStatusError as exc:
+        logger.warning("AIOSEO API error: %s %s -> %s", method.upper(), url, exc)
+        return None
+    except httpx.RequestError as exc:
+        logger.warning("AIOSEO request failed: %s", exc)
+        return None
+
+
+def _term_key(name: str) -> str:
+    return " ".join(unescape(name or "").split()).lower()
+
+
+def _fetch_all_terms(taxonomy: str) -> dict[str, tuple[int, str]] | None:
+    """Page through every term of a taxonomy. Returns None if any page fails."""
+    terms: dict[str, tuple[int, str]] = {}
+    page = 1
+    while True:
+        resp = _request(
+            "get",
+            taxonomy,
+            params={"per_page": 100, "page": page, "_fields": "id,name"},
+            retry_on_500=False,
+        )
+        if not resp:
+            return None
         try:
-            resp = getattr(client, method)(url, **kwargs)
-            if resp.status_code >= 500 and retry_on_500:
-                logger.warning("AIOSEO API 500, retrying once in 5s...")
-                time.sleep(5)
-                resp = getattr(client, method)(url, **kwargs)
-            resp.raise_for_status()
-            return resp
-        except httpx.HTTPStatusError as exc:
-            logger.warning("AIOSEO API error: %s %s -> %s", method.upper(), url, exc)
+            items = resp.json()
+            total_pages = int(resp.headers.get("X-WP-TotalPages", "1") or 1)
+        except Exception:
             return None
-        except httpx.RequestError as exc:
-            logger.warning("AIOSEO request failed: %s", exc)
+        for term in items if isinstance(items, list) else []:
+            try:
+                terms.setdefault(_term_key(str(term["name"])), (int(term["id"]), str(term["name"])))
+            except Exception:
+                continue
+        if page >= total_pages:
+            return terms
+        page += 1
+
+
+def _term_index(taxonomy: str) -> dict[str, int] | None:
+    """Return the in-memory name->id index, loading it from state or WordPress once."""
+    with _TERM_LOCK:
+        if taxonomy in _TERM_INDEX:
+            return _TERM_INDEX[taxonomy]
+        if taxonomy in _TERM_INDEX_FAILED:
             return None
+        max_age = config.WP_TERMS_CACHE_TTL_HOURS * 3600
+        index = state.get_wp_terms(taxonomy, max_age_seconds=max_age)
+        if index is None:
+            fetched = _fetch_all_terms(taxonomy)
+            if fetched is None:
+                _TERM_INDEX_FAILED.add(taxonomy)
+                logger.warning(
+                    "No se pudo indexar '%s'; se resolverá término por término el resto de la corrida.",
+                    taxonomy,
+                )
+                return None
+            state.replace_wp_terms(taxonomy, fetched)
+            index = {key: term_id for key, (term_id, _) in fetched.items()}
+            logger.info("Índice de '%s' actualizado (%d términos)", taxonomy, len(index))
+        _TERM_INDEX[taxonomy] = index
+        return index
 
 
-def _resolve_or_create_term(taxonomy: str, name: str) -> int | None:
-    """Find existing term by name or create it. Returns term ID."""
-    # Search existing
+def _remember_term(taxonomy: str, name: str, term_id: int) -> None:
+    key = _term_key(name)
+    with _TERM_LOCK:
+        if taxonomy in _TERM_INDEX:
+            _TERM_INDEX[taxonomy][key] = term_id
+    state.save_wp_term(taxonomy, key, term_id, name)
+
+
+def _search_term(taxonomy: str, name: str) -> int | None:
     resp = _request("get", taxonomy, params={"search": name, "per_page": 100})
     if resp:
         for term in resp.json():
-            if term["name"].lower() == name.lower():
+            if _term_key(term["name"]) == _term_key(name):
                 return term["id"]
+    return None
+
+
+def _find_term(taxonomy: str, name: str, index: dict[str, int] | None) -> int | None:
+    """Look up an existing term by name without creating it."""
+    if index is not None:
+        return index.get(_term_key(name))
+    term_id = _search_term(taxonomy, name)
+    if term_id:
+        _remember_term(taxonomy, name, term_id)
+    return term_id
+
+
+def _resolve_or_create_term(taxonomy: str, name: str) -> int | None:
+    """Find existing term by name or create it. Returns term ID."""
+    index = _term_index(taxonomy)
+    term_id = _find_term(taxonomy, name, index)
+    if term_id:
+        return term_id
     # Create new
     resp = _request("post", taxonomy, json={"name": name})
     if resp:
         term_id = resp.json()["id"]
         logger.info("Created %s '%s' (id=%d)", taxonomy, name, term_id)
+        _remember_term(taxonomy, name, term_id)
         return term_id
+    # A stale index can miss a term created elsewhere; WordPress rejects the duplicate.
+    if index is not None:
+        term_id = _search_term(taxonomy, name)
+        if term_id:
+            _remember_term(taxonomy, name, term_id)
+            return term_id
     return None
 
 
@@ -236,6 +400,109 @@ def _resolve_terms(taxonomy: str, names: list[str]) -> list[int]:
     return ids
 
 
+def _match_user(users: list, key: str) -> dict | None:
+    exact_match = None
+    fallback_match = None
+    for user in users:
+        if not isinstance(user, dict):
+            continue
+        values = [
+            str(user.get("name", "")),
+            str(user.get("slug", "")),
+            str(user.get("username", "")),
+            str(user.get("nickname", "")),
+        ]
+        normalized_values = [_normalize_name(v) for v in values if v]
+        if key in normalized_values:
+            exact_match = user
+            break
+        if fallback_match is None and any(key in nv for nv in normalized_values):
+            fallback_match = user
+    return exact_match or fallback_match
+
+
+def _fetch_all_users() -> list[dict] | None:
+    users: list[dict] = []
+    page = 1
+    while True:
+        resp = _request(
+            "get",
+            "users",
+            params={"per_page": 100, "page": page},
+            retry_on_500=False,
+        )
+        if not resp:
+            return None
+        try:
+            items = resp.json()
+            total_pages = int(resp.headers.get("X-WP-TotalPages", "1") or 1)
+        except Exception:
+            return None
+        if isinstance(items, list):
+            users.extend(u for u in items if isinstance(u, dict))
+        if page >= total_pages:
+            return users
+        page += 1
+
+
+def _configured_author_names() -> list[str]:
+    """Every author_name referenced in topics.yml and cuadernillos_map.yml."""
+    names: list[str] = []
+    try:
+        names.extend(t.author_name for t in topics.load_topics(config.TOPICS_FILE))
+    except Exception as exc:
+        logger.warning("No se pudieron leer autores de topics.yml: %s", exc)
+    try:
+        names.extend(
+            str(m.get("author_name", ""))
+            for m in cuadernillo_source.load_map().get("materias", [])
+            if isinstance(m, dict)
+        )
+    except Exception as exc:
+        logger.warning("No se pudieron leer autores de cuadernillos_map.yml: %s", exc)
+    return [n for n in (" ".join(name.split()) for name in names) if n]
+
+
+def warm_author_cache() -> None:
+    """Load author ids once per process: from state if fresh, else one bulk /users pass."""
+    global _AUTHORS_WARMED
+    with _AUTHOR_LOCK:
+        if _AUTHORS_WARMED:
+            return
+        _AUTHORS_WARMED = True
+        max_age = config.WP_AUTHOR_CACHE_TTL_HOURS * 3600
+        cached = state.get_wp_authors(max_age_seconds=max_age)
+        if cached is not None:
+            _AUTHOR_CACHE.update(cached)
+            return
+
+        users = _fetch_all_users()
+        if users is None:
+            logger.warning("No se pudo listar usuarios de WordPress para precargar autores.")
+            return
+        resolved: dict[str, tuple[int, str]] = {}
+        seen: set[str] = set()
+        for name in _configured_author_names():
+            key = _normalize_name(name)
+            if key in seen:
+                continue
+            seen.add(key)
+            user = _match_user(users, key)
+            if not user:
+                logger.warning("No hubo coincidencia de autor para '%s'.", name)
+                continue
+            try:
+                resolved[key] = (int(user["id"]), name)
+            except Exception:
+                continue
+        state.replace_wp_authors(resolved)
+        _AUTHOR_CACHE.update({key: author_id for key, (author_id, _) in resolved.items()})
+        logger.info(
+            "Autores precargados: %d resueltos de %d usuarios de WordPress",
+            len(resolved), len(users),
+        )
+
+
 def _resolve_author_id(author_name: str) -> int | None:
     """Resolve WordPress user ID from display name/slug."""
     clean_name = " ".join((author_name or "").split())
@@ -243,6 +510,8 @@ def _resolve_author_id(author_name: str) -> int | None:
         return None
 
     key = _normalize_name(clean_name)
+    if key not in _AUTHOR_CACHE:
+        warm_author_cache()
     if key in _AUTHOR_CACHE:
         return _AUTHOR_CACHE[key]
 
@@ -265,23 +534,7 @@ def _resolve_author_id(author_name: str) -> int | None:
         logger.warning("No se encontró autor en WordPress con nombre '%s'.", clean_name)
         return None
 
-    exact_match = None
-    fallback_match = None
-    for user in users:
-        values = [
-            str(user.get("name", "")),
-            str(user.get("slug", "")),
-            str(user.get("username", "")),
-            str(user.get("nickname", "")),
-        ]
-        normalized_values = [_normalize_name(v) for v in values if v]
-        if key in normalized_values:
-            exact_match = user
-            break
-        if fallback_match is None and any(key in nv for nv in normalized_values):
-            fallback_match = user
-
-    chosen = exact_match or fallback_match
+    chosen = _match_user(users, key)
     if not chosen:
         logger.warning("No hubo coincidencia de autor para '%s'.", clean_name)
         return None
@@ -293,6 +546,7 @@ def _resolve_author_id(author_name: str) -> int | None:
         return None
 
     _AUTHOR_CACHE[key] = author_id
+    state.save_wp_author(key, author_id, clean_name)
     logger.info("Autor '%s' resuelto a user_id=%d", clean_name, author_id)
     return author_id
 
@@ -476,13 +730,83 @@ def list_recent_published_posts(limit: int = 6, exclude_ids: set[int] | None = N
     return posts
 
 
+def find_draft_by_title(title: str) -> int | None:
+    """Return the id of an unpublished post whose title is exactly ``title``."""
+    clean_title = " ".join((title or "").split())
+    if not clean_title:
+        return None
+    resp = _request(
+        "get",
+        "posts",
+        params={
+            "search": clean_title,
+            "status": "draft,pending,future,private",
+            "context": "edit",
+            "per_page": 20,
+        },
+        retry_on_500=False,
+    )
+    if not resp:
+        return None
+    try:
+        items = resp.json()
+    except Exception:
+        return None
+    for item in items if isinstance(items, list) else []:
+        title_field = item.get("title", {}) if isinstance(item, dict) else {}
+        raw = title_field.get("raw") or unescape(re.sub(r"<[^>]+>", "", title_field.get("rendered", "")))
+        if " ".join(str(raw).split()) == clean_title:
+            try:
+                return int(item["id"])
+            except Exception:
+                continue
+    return None
+
+
+def prefetch_draft_refs(post: GeneratedPost, author_name: str = "") -> None:
+    """Warm the term indexes and author cache for ``post`` without writing to WordPress.
+
+    Safe to run before the post is known to be publishable; the later
+    ``resolve_draft_refs`` call then only has to create missing terms.
+    """
+    for taxonomy, names in (("categories", post.categories), ("tags", post.tags)):
+        index = _term_index(taxonomy)
+        if index is None:
+            for name in names:
+                _find_term(taxonomy, name.strip(), index)
+    _resolve_author_id(author_name)
+
+
+def resolve_draft_refs(
+    post: GeneratedPost, author_name: str = ""
+) -> tuple[list[int], list[int], int | None]:
+    """Resolve (category_ids, tag_ids, author_id) ahead of ``create_draft``.
+
+    Lets callers pass the ids in; missing terms are created in WordPress as
+    a side effect, so only call it once the post is going to be published.
+    """
+    return (
+        _resolve_terms("categories", post.categories),
+        _resolve_terms("tags", post.tags),
+        _resolve_author_id(author_name),
+    )
+
+
 def create_draft(
-    post: GeneratedPost, media_id: int | None = None, author_name: str = ""
+    post: GeneratedPost,
+    media_id: int | None = None,
+    author_name: str = "",
+    *,
+    refs: tuple[list[int], list[int], int | None] | None = None,
+    on_created: Callable[[int], None] | None = None,
 ) -> int | None:
-    """Create a WordPress draft post. Returns post ID."""
-    category_ids = _resolve_terms("categories", post.categories)
-    tag_ids = _resolve_terms("tags", post.tags)
-    author_id = _resolve_author_id(author_name)
+    """Create a WordPress draft post. Returns post ID.
+
+    ``refs`` takes pre-resolved ids from ``resolve_draft_refs``; without it
+    they are resolved here. ``on_created`` receives the new id as soon as
+    WordPress returns it, before the AIOSEO sync, so callers can checkpoint it.
+    """
+    category_ids, tag_ids, author_id = refs if refs is not None else resolve_draft_refs(post, author_name)
 
     payload: dict = {
         "title": post.title,
@@ -506,6 +830,8 @@ def create_draft(
     resp = _request("post", "posts", json=payload)
     if resp:
         post_id = resp.json()["id"]
+        if on_created is not None:
+            on_created(post_id)
         _sync_aioseo(post_id, post)
         logger.info("Draft created: id=%d, title='%s'", post_id, post.title)
         return post_id